@@ -0,0 +1,81 @@
+# Copyright 2020 ETSI OSM
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Runs the benchmarks and prints their report
+"""
+
+import json
+import multiprocessing
+
+import click
+from prettytable import PrettyTable
+
+from osmclient.benchmarks.scenarios import SCENARIOS
+
+
+def run_isolated(function, *args):
+    """
+    Runs function in a new process, so that its peak RSS is not affected by the previous runs
+    """
+    with multiprocessing.get_context('spawn').Pool(processes=1) as pool:
+        return pool.apply(function, args)
+
+
+@click.command()
+@click.option('--scenario', 'scenarios', multiple=True, type=click.Choice(list(SCENARIOS)),
+              help='scenario to run, can be repeated (default to all of them)')
+@click.option('--records', default='10,1000,10000',
+              help='comma separated numbers of NS records of the get-by-name and ns-list-long scenarios')
+@click.option('--iterations', default=10, type=click.IntRange(1, None), help='runs of each scenario')
+@click.option('--latency', default=0.0, type=click.FloatRange(0, None),
+              help='milliseconds waited by the mock NBI before every response')
+@click.option('--payload', default=0, type=click.IntRange(0, None),
+              help='extra bytes of every record served by the mock NBI')
+@click.option('--upload-size', default=20, type=click.IntRange(1, None), help='size of the uploaded package in MB')
+@click.option('--upload-chunk-size', default=None, type=click.IntRange(1, None),
+              help='upload the package in chunks of this size in MB')
+@click.option('--polls', default=5, type=click.IntRange(1, None),
+              help='requests until the operation of the wait scenario completes')
+@click.option('--poll-interval', default=0.05, type=click.FloatRange(0, None),
+              help='seconds between polls in the wait scenario')
+@click.option('--json', 'as_json', is_flag=True, help='print the results as JSON')
+def main(scenarios, records, as_json, **options):
+    """Benchmarks osmclient against an in-process mock NBI"""
+    options['latency'] /= 1000.0
+    results = []
+    for name in scenarios or SCENARIOS:
+        function, per_records = SCENARIOS[name]
+        for number in [int(n) for n in records.split(',')] if per_records else [None]:
+            results.append(run_isolated(function, options, number))
+    if as_json:
+        print(json.dumps(results, indent=2))
+        return
+    table = PrettyTable(['scenario', 'records', 'p50 (ms)', 'p90 (ms)', 'p99 (ms)', 'max (ms)', 'requests',
+                         'peak RSS (MB)', 'throughput (MB/s)'])
+    table.align = 'r'
+    table.align['scenario'] = 'l'
+    for result in results:
+        table.add_row([result['scenario'], result.get('records', '-'),
+                       '{:.1f}'.format(result['p50'] * 1000), '{:.1f}'.format(result['p90'] * 1000),
+                       '{:.1f}'.format(result['p99'] * 1000), '{:.1f}'.format(result['max'] * 1000),
+                       '{:g}'.format(result['requests']), '{:.1f}'.format(result['peak_rss']),
+                       '{:.1f}'.format(result['throughput']) if 'throughput' in result else '-'])
+    print(table)
+
+
+if __name__ == '__main__':
+    main()
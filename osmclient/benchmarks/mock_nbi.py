@@ -0,0 +1,224 @@
+# Copyright 2020 ETSI OSM
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+In-process mock of the subset of the SOL005 NBI used by the benchmarks
+"""
+
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import json
+import re
+import socketserver
+import threading
+import time
+import uuid
+
+PROJECT_ID = '2d2c2d1f-0e6a-4d5e-9c2b-6ad1b3a2c001'
+RESOURCE_RE = re.compile(r'^/osm(/[^/]+/v1/[^/?]+)(?:/([^/?]+))?/?(?:\?.*)?$')
+
+
+class ThreadingServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class MockNbi(object):
+    """
+    Serves ns, vnf, vnfd and vim records, generated with names ns-0, ns-1... and with payload extra
+    bytes each. Every request waits latency seconds before being answered. NS deletions start an
+    operation that is PROCESSING for polls requests to ns_lcm_op_occs, and COMPLETED then. Uploaded
+    packages are read and discarded, in one request or in Content-Range chunks. The Content-Range and
+    Transaction-Id of the chunks are kept in chunks, and the next fail_chunks chunks are answered with 503
+    """
+
+    def __init__(self, ns=10, vnf=10, vnfd=10, vim=3, latency=0, payload=0, polls=3):
+        self.latency = latency
+        self.polls = polls
+        self.requests = Counter()
+        self.uploaded = 0
+        self.chunks = []
+        self.fail_chunks = 0
+        self._lock = threading.Lock()
+        self._operations = {}
+        self._server = None
+        vims = [self._vim(i, payload) for i in range(vim)]
+        self._collections = {
+            '/admin/v1/projects': [{'_id': PROJECT_ID, 'name': 'admin'}],
+            '/admin/v1/vim_accounts': vims,
+            '/nslcm/v1/ns_instances_content': [self._ns(i, payload, vims) for i in range(ns)],
+            '/nslcm/v1/vnfrs': [self._vnf(i, payload) for i in range(vnf)],
+            '/vnfpkgm/v1/vnf_packages': [self._vnfd(i, payload) for i in range(vnfd)],
+        }
+        # The responses are serialized once, so that the server takes little time from the client
+        self._bodies = {path: json.dumps(records).encode() for path, records in self._collections.items()}
+        self._records = {(path, record['_id']): json.dumps(record).encode()
+                         for path, records in self._collections.items() for record in records}
+
+    @staticmethod
+    def _ns(i, payload, vims):
+        return {
+            '_id': str(uuid.UUID(int=i)),
+            'name': 'ns-{}'.format(i),
+            'create-time': 1600000000 + i,
+            'nsState': 'READY',
+            'datacenter': vims[i % len(vims)]['_id'] if vims else None,
+            'currentOperation': 'IDLE',
+            'currentOperationID': None,
+            'errorDescription': None,
+            'errorDetail': None,
+            'deploymentStatus': {
+                'nets': [{'status': 'ACTIVE'}],
+                'vnfs': [{'member_vnf_index': '1', 'vms': [{'status': 'ACTIVE'}, {'status': 'ACTIVE'}]}],
+            },
+            'configurationStatus': [{'elementType': 'VNF', 'status': 'READY'}],
+            'description': 'x' * payload,
+            '_admin': {'nsState': 'INSTANTIATED', 'projects_read': [PROJECT_ID], 'nslcmop': None},
+        }
+
+    @staticmethod
+    def _vnf(i, payload):
+        return {'_id': str(uuid.UUID(int=0x1000000 + i)), 'name': 'vnf-{}'.format(i),
+                'member-vnf-index-ref': '1', 'nsr-id-ref': str(uuid.UUID(int=i)),
+                'description': 'x' * payload}
+
+    @staticmethod
+    def _vnfd(i, payload):
+        return {'_id': str(uuid.UUID(int=0x2000000 + i)), 'id': 'vnfd-{}'.format(i), 'name': 'vnfd-{}'.format(i),
+                'description': 'x' * payload, '_admin': {'onboardingState': 'ONBOARDED'}}
+
+    @staticmethod
+    def _vim(i, payload):
+        return {'_id': str(uuid.UUID(int=0x3000000 + i)), 'name': 'vim-{}'.format(i), 'vim_type': 'openstack',
+                'description': 'x' * payload, '_admin': {'operationalState': 'ENABLED'}}
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}/osm'.format(self._server.server_address[1])
+
+    def start(self):
+        self._server = ThreadingServer(('127.0.0.1', 0), self._handler())
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def request_count(self):
+        return sum(self.requests.values())
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests.clear()
+            self.uploaded = 0
+            self.chunks = []
+
+    def _handler(self):
+        nbi = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                nbi._serve(self, 'GET')
+
+            def do_POST(self):
+                nbi._serve(self, 'POST')
+
+            def do_DELETE(self):
+                nbi._serve(self, 'DELETE')
+
+        return Handler
+
+    def _serve(self, handler, method):
+        match = RESOURCE_RE.match(handler.path)
+        collection, item = match.groups() if match else (None, None)
+        with self._lock:
+            self.requests['{} {}'.format(method, collection)] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if method == 'POST':
+            return self._post(handler, collection)
+        if method == 'DELETE' and (collection, item) in self._records:
+            operation_id = str(uuid.uuid4())
+            with self._lock:
+                self._operations[operation_id] = 0
+            return self._reply(handler, 202, {'_id': operation_id})
+        if method == 'GET' and collection == '/nslcm/v1/ns_lcm_op_occs' and item in self._operations:
+            with self._lock:
+                self._operations[item] += 1
+                done = self._operations[item] >= self.polls
+            return self._reply(handler, 200, {
+                '_id': item, 'operationState': 'COMPLETED' if done else 'PROCESSING',
+                'detailed-status': 'done' if done else 'polling {}'.format(self._operations[item])})
+        if method == 'GET' and item is None and collection in self._bodies:
+            return self._reply(handler, 200, self._bodies[collection])
+        if method == 'GET' and (collection, item) in self._records:
+            return self._reply(handler, 200, self._records[(collection, item)])
+        self._reply(handler, 404, {'code': 'NOT_FOUND', 'status': 404,
+                                   'detail': 'Not found {} {}'.format(method, handler.path)})
+
+    def _post(self, handler, collection):
+        remaining = int(handler.headers.get('Content-Length', 0))
+        while remaining:
+            data = handler.rfile.read(min(remaining, 1024 * 1024))
+            if not data:
+                break
+            remaining -= len(data)
+            with self._lock:
+                self.uploaded += len(data)
+        if collection == '/admin/v1/tokens':
+            return self._reply(handler, 200, {'id': uuid.uuid4().hex, 'project_id': PROJECT_ID,
+                                              'expires': time.time() + 3600})
+        if collection != '/vnfpkgm/v1/vnf_packages_content':
+            return self._reply(handler, 404, {'code': 'NOT_FOUND', 'status': 404, 'detail': handler.path})
+        content_range = handler.headers.get('Content-Range')
+        package_id = str(uuid.uuid4())
+        if content_range:
+            # Chunked upload: the Transaction-Id is returned until the last chunk
+            end, total = (int(n) for n in re.match(r'bytes \d+-(\d+)/(\d+)', content_range).groups())
+            with self._lock:
+                self.chunks.append((content_range, handler.headers.get('Transaction-Id')))
+                failed = self.fail_chunks > 0
+                self.fail_chunks -= failed
+            if failed:
+                return self._reply(handler, 503, {'code': 'SERVICE_UNAVAILABLE', 'status': 503, 'detail': 'retry'},
+                                   {'Retry-After': '0'})
+            transaction_id = handler.headers.get('Transaction-Id') or uuid.uuid4().hex
+            if end + 1 < total:
+                return self._reply(handler, 201, {'id': transaction_id}, {'Transaction-Id': transaction_id})
+        self._reply(handler, 201, {'id': package_id})
+
+    @staticmethod
+    def _reply(handler, code, body, headers=None):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        handler.send_response(code)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            handler.send_header(key, value)
+        handler.end_headers()
+        handler.wfile.write(body)
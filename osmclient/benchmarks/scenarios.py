@@ -0,0 +1,175 @@
+# Copyright 2020 ETSI OSM
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Benchmark scenarios. Each one runs an osmclient operation several times against a MockNbi, and returns
+a dict with its latency percentiles in seconds, the NBI requests per iteration and the peak RSS in MB
+"""
+
+from collections import OrderedDict
+import contextlib
+import gzip
+import logging
+import math
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import click
+import verboselogs
+
+from osmclient.benchmarks.mock_nbi import MockNbi
+from osmclient.common import wait
+from osmclient.scripts import osm
+from osmclient.sol005.client import Client
+
+verboselogs.install()
+
+
+def percentile(values, percent):
+    """
+    Returns the percentile of values by the nearest-rank method
+    """
+    ordered = sorted(values)
+    rank = max(int(math.ceil(percent / 100.0 * len(ordered))), 1)
+    return ordered[rank - 1]
+
+
+def peak_rss():
+    """
+    Returns the peak resident set size of the process in MB
+    """
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes in macOS, and in KB in Linux
+    return maxrss / 1048576.0 if sys.platform == 'darwin' else maxrss / 1024.0
+
+
+def make_client(nbi, **kwargs):
+    client = Client(host='127.0.0.1', no_cache=True, retries=0, **kwargs)
+    # The mock NBI is served over plain HTTP
+    client._http_client._url = nbi.url
+    return client
+
+
+def measure(name, nbi, function, iterations, **extra):
+    """
+    Calls function iterations times, with the standard output discarded
+    """
+    latencies = []
+    nbi.reset_counters()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(iterations):
+            start = time.perf_counter()
+            function()
+            latencies.append(time.perf_counter() - start)
+    result = {
+        'scenario': name,
+        'iterations': iterations,
+        'p50': percentile(latencies, 50),
+        'p90': percentile(latencies, 90),
+        'p99': percentile(latencies, 99),
+        'max': max(latencies),
+        'requests': nbi.request_count() / float(iterations),
+        'peak_rss': peak_rss(),
+    }
+    result.update(extra)
+    return result
+
+
+def token(options, records=None):
+    """
+    Creation of a client and acquisition of its token, as done by every osm command
+    """
+    with MockNbi(latency=options['latency']) as nbi:
+        return measure('token', nbi, lambda: make_client(nbi).get_token(), options['iterations'])
+
+
+def get_by_name(options, records):
+    """
+    ns.get() of the last of records NS instances
+    """
+    with MockNbi(ns=records, latency=options['latency'], payload=options['payload']) as nbi:
+        client = make_client(nbi)
+        client.get_token()
+        name = 'ns-{}'.format(records - 1)
+        return measure('get-by-name', nbi, lambda: client.ns.get(name), options['iterations'], records=records)
+
+
+def ns_list_long(options, records):
+    """
+    "osm ns-list --long" with records NS instances, including the table output
+    """
+    with MockNbi(ns=records, vnf=records, latency=options['latency'], payload=options['payload']) as nbi:
+        client = make_client(nbi)
+        client.get_token()
+        # Set by the osm group command, that is not run here
+        osm.logger = logging.getLogger('osmclient')
+
+        def ns_list():
+            with click.Context(osm.ns_list, obj=client) as ctx:
+                ctx.invoke(osm.ns_list, filter=None, long=True)
+
+        return measure('ns-list-long', nbi, ns_list, options['iterations'], records=records)
+
+
+def upload(options, records=None):
+    """
+    Onboarding of a VNF package of upload_size MB, in chunks of upload_chunk_size MB if set
+    """
+    chunk_size = options['upload_chunk_size']
+    with tempfile.TemporaryDirectory() as directory:
+        package = os.path.join(directory, 'package.tar.gz')
+        # Random content, that cannot be compressed
+        with gzip.open(package, 'wb', compresslevel=1) as f:
+            for _ in range(options['upload_size']):
+                f.write(os.urandom(1024 * 1024))
+        size = os.path.getsize(package) / 1048576.0
+        with MockNbi(latency=options['latency']) as nbi:
+            client = make_client(nbi, upload_chunk_size=chunk_size * 1024 * 1024 if chunk_size else None)
+            client.get_token()
+            result = measure('upload', nbi, lambda: client.vnfd.create(package), options['iterations'])
+    result['throughput'] = size / result['p50']
+    return result
+
+
+def wait_polling(options, records=None):
+    """
+    "osm ns-delete --wait" of an operation that completes after polls requests
+    """
+    polling_interval, stderr = wait.POLLING_TIME_INTERVAL, wait.stderr
+    try:
+        with MockNbi(ns=1, latency=options['latency'], polls=options['polls']) as nbi, \
+                open(os.devnull, 'w') as devnull:
+            wait.POLLING_TIME_INTERVAL = options['poll_interval']
+            # The detailed status is written to stderr
+            wait.stderr = devnull
+            client = make_client(nbi)
+            client.get_token()
+            return measure('wait', nbi, lambda: client.ns.delete('ns-0', wait=True), options['iterations'])
+    finally:
+        wait.POLLING_TIME_INTERVAL, wait.stderr = polling_interval, stderr
+
+
+# Scenarios by name, with True if they are run for each number of records
+SCENARIOS = OrderedDict([
+    ('token', (token, False)),
+    ('get-by-name', (get_by_name, True)),
+    ('ns-list-long', (ns_list_long, True)),
+    ('upload', (upload, False)),
+    ('wait', (wait_polling, False)),
+])
@@ -0,0 +1,112 @@
+# Copyright 2020 ETSI OSM
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Disk cache of HTTP responses, revalidated with ETag/Last-Modified
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+CACHE_DIR = os.getenv('OSM_HTTP_CACHE_DIR', os.path.join(
+    os.getenv('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'osmclient', 'http'))
+# Maximum size of the cache in MB. The least recently used responses are evicted
+CACHE_DEFAULT_SIZE = 100
+
+
+def _get_cache_size():
+    value = os.getenv('OSM_HTTP_CACHE_SIZE')
+    if value is None:
+        return CACHE_DEFAULT_SIZE
+    try:
+        return max(int(value), 0)
+    except ValueError:
+        logging.getLogger('osmclient').warning('Invalid OSM_HTTP_CACHE_SIZE {}, using {} MB'.format(
+            value, CACHE_DEFAULT_SIZE))
+        return CACHE_DEFAULT_SIZE
+
+
+CACHE_MAX_SIZE = _get_cache_size()
+
+
+class HttpCache(object):
+    """
+    Stores response bodies with their validators, one file per key: a JSON line with the
+    validators followed by the body
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_size=CACHE_MAX_SIZE * 1024 * 1024):
+        self._directory = directory
+        self._max_size = max_size
+        self._logger = logging.getLogger('osmclient')
+
+    def _path(self, key):
+        return os.path.join(self._directory, hashlib.sha256(key.encode()).hexdigest())
+
+    def get(self, key):
+        """
+        Returns (validators, body) of the response stored for key, or (None, None)
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                validators = json.loads(f.readline().decode())
+                body = f.read()
+            # The modification time orders the entries for the eviction
+            os.utime(path)
+        except (OSError, ValueError):
+            return None, None
+        return validators, body
+
+    def put(self, key, validators, body):
+        """
+        Stores body with its validators (dict with etag and/or last_modified)
+        """
+        if len(body) > self._max_size:
+            return
+        try:
+            os.makedirs(self._directory, mode=0o700, exist_ok=True)
+            fd, temp_file = tempfile.mkstemp(dir=self._directory, prefix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(json.dumps(validators).encode() + b'\n')
+                f.write(body)
+            os.replace(temp_file, self._path(key))
+            self.evict()
+        except OSError as e:
+            self._logger.warning('Cannot write to the HTTP cache {}: {}'.format(self._directory, e))
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits in max_size
+        """
+        entries = []
+        total = 0
+        for entry in os.scandir(self._directory):
+            if entry.is_file() and not entry.name.startswith('.'):
+                stat_result = entry.stat()
+                entries.append((stat_result.st_mtime, stat_result.st_size, entry.path))
+                total += stat_result.st_size
+        for _, size, path in sorted(entries):
+            if total <= self._max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
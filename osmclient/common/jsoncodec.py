@@ -0,0 +1,71 @@
+# Copyright 2020 ETSI OSM
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+JSON codec of the NBI requests and responses. The standard json module is used unless orjson or ujson are
+installed, which parse big responses several times faster. OSM_JSON_CODEC selects one of them
+"""
+
+import json
+import logging
+import os
+
+from osmclient.common.exceptions import ClientException
+
+# Codecs tried, in order, by the 'auto' selection
+CODECS = ('orjson', 'ujson', 'json')
+
+codec = None
+# loads accepts str or bytes, dumps returns str
+loads = json.loads
+dumps = json.dumps
+
+
+def _import_codec(name):
+    if name == 'orjson':
+        import orjson
+        # As json, keys such as numbers are converted to strings
+        return orjson.loads, lambda obj: orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    if name == 'ujson':
+        import ujson
+        return ujson.loads, ujson.dumps
+    if name == 'json':
+        return json.loads, json.dumps
+    raise ClientException('Unknown JSON codec {}, use one of: auto, {}'.format(name, ', '.join(CODECS)))
+
+
+def set_codec(name='auto'):
+    """
+    Selects the codec used by loads and dumps: 'auto' for the first of CODECS that is installed, or one
+    of CODECS
+    """
+    global codec, loads, dumps
+    for candidate in CODECS if name == 'auto' else (name,):
+        try:
+            loads, dumps = _import_codec(candidate)
+        except ImportError:
+            if name != 'auto':
+                raise ClientException('JSON codec {} is not installed'.format(name))
+            continue
+        codec = candidate
+        return
+
+
+try:
+    set_codec(os.getenv('OSM_JSON_CODEC', 'auto'))
+except ClientException as e:
+    logging.getLogger('osmclient').warning('{}, using json'.format(e))
+    set_codec('json')
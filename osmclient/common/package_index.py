@@ -0,0 +1,236 @@
+# Copyright 2020 ETSI OSM
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+In-memory search index of the packages of OSM repositories
+"""
+
+from osmclient.common.exceptions import ClientException
+from packaging import version as versioning
+from packaging.specifiers import SpecifierSet, InvalidSpecifier
+import bisect
+import operator
+import re
+
+# Fields with a map from value to packages
+INDEXED_FIELDS = ('name', 'vendor', 'description', 'repository')
+VERSION_OPERATORS = {'>=': operator.ge, '<=': operator.le, '>': operator.gt, '<': operator.lt,
+                     '==': operator.eq, '!=': operator.ne}
+CONDITION_RE = re.compile(r'^\s*([\w-]+)\s*(>=|<=|==|!=|~|>|<|=)(.*)$')
+TOKEN_RE = re.compile(r'\w+')
+
+
+def parse_version(version):
+    try:
+        return versioning.Version(str(version))
+    except versioning.InvalidVersion:
+        raise ClientException("Invalid version '{}'".format(version))
+
+
+class PackageIndex(object):
+    """
+    Index of the package entries returned by OSMRepo.pkg_list.
+
+    Filters are a list of conditions separated by '&':
+        key=value    value is a substring of the package key (checked once per distinct value of
+                     name, vendor, description and repository)
+        key==value   the package key is exactly value
+        description~words    all the words appear in the description
+        version>=1.2 (also >, <, <=, ==, !=)    version comparison
+    """
+
+    def __init__(self, packages=()):
+        self._packages = []
+        self._fields = {field: {} for field in INDEXED_FIELDS}
+        self._tokens = {}
+        # Package name -> sorted list of (version, position)
+        self._versions = {}
+        for package in packages:
+            self.add(package)
+
+    def add(self, package):
+        position = len(self._packages)
+        self._packages.append(package)
+        for field in INDEXED_FIELDS:
+            value = package.get(field)
+            if value:
+                self._fields[field].setdefault(value, []).append(position)
+        for token in set(TOKEN_RE.findall((package.get('description') or '').lower())):
+            self._tokens.setdefault(token, set()).add(position)
+        try:
+            package_version = versioning.Version(str(package.get('version')))
+        except versioning.InvalidVersion:
+            return
+        bisect.insort(self._versions.setdefault(package.get('name'), []), (package_version, position))
+
+    def versions(self, name):
+        """
+        Returns the sorted list of versions of the package name
+        """
+        return [package_version for package_version, _ in self._versions.get(name, [])]
+
+    def search(self, filter=None):
+        """
+        Returns the packages matching filter, in the order they were added
+        """
+        if not filter:
+            return list(self._packages)
+        return [self._packages[position] for position in self._search(filter)]
+
+    def resolve(self, name, version='latest', filter=None):
+        """
+        Returns the package name with the highest version matching version, or None.
+        version can be 'latest', an exact version, or a list of constraints such as '>=1.2,<2'.
+        As with pip, pre-releases are only considered when no final release matches, or when a
+        constraint or the exact version refers to a pre-release.
+        If no version of the package is a valid PEP 440 version, 'latest' is the package marked as
+        latest by its repository index, or else the highest version compared as a string
+        """
+        allowed = set(self._search(filter)) if filter else None
+        version_list = self._versions.get(name, [])
+        version = (version or 'latest').strip()
+        if version != 'latest' and version[0] not in '<>=!~':
+            try:
+                wanted = versioning.Version(version)
+            except versioning.InvalidVersion:
+                # Versions that cannot be parsed are compared as strings
+                for position in self._fields['name'].get(name, ()):
+                    if str(self._packages[position].get('version')) == version and \
+                            (allowed is None or position in allowed):
+                        return self._packages[position]
+                return None
+            # Exact versions are found with a binary search
+            index = bisect.bisect_left(version_list, (wanted,))
+            while index < len(version_list) and version_list[index][0] == wanted:
+                if allowed is None or version_list[index][1] in allowed:
+                    return self._packages[version_list[index][1]]
+                index += 1
+            return None
+        try:
+            specifier = SpecifierSet('' if version == 'latest' else version)
+        except InvalidSpecifier:
+            raise ClientException("Invalid version constraint '{}'".format(version))
+        # Pre-releases are accepted when a constraint refers to one
+        prereleases = bool(specifier.prereleases)
+        prerelease = None
+        # The list is sorted, so the first match from the end is the best one
+        for package_version, position in reversed(version_list):
+            if allowed is not None and position not in allowed:
+                continue
+            if specifier.contains(package_version, prereleases=prereleases):
+                return self._packages[position]
+            if prerelease is None and specifier.contains(package_version, prereleases=True):
+                prerelease = self._packages[position]
+        if prerelease is None and version == 'latest':
+            return self._latest_unparsed(name, allowed)
+        return prerelease
+
+    def _latest_unparsed(self, name, allowed):
+        # Packages whose version is not in self._versions, as it cannot be parsed
+        parsed = {position for _, position in self._versions.get(name, [])}
+        candidates = [self._packages[position] for position in self._fields['name'].get(name, ())
+                      if position not in parsed and (allowed is None or position in allowed)]
+        if not candidates:
+            return None
+        marked = [package for package in candidates if package.get('latest')]
+        return (marked or sorted(candidates, key=lambda package: str(package.get('version'))))[-1]
+
+    def _search(self, filter):
+        conditions = []
+        for condition in filter.split('&'):
+            match = CONDITION_RE.match(condition)
+            if not match:
+                raise ClientException("Invalid filter '{}'".format(condition))
+            conditions.append(match.groups())
+        candidates = None
+        remaining = []
+        # Indexed conditions narrow the candidates, the rest are checked on the candidates only
+        for key, op, value in conditions:
+            if key in INDEXED_FIELDS and op in ('=', '=='):
+                positions = self._match_field(key, op, value)
+            elif key == 'description' and op == '~':
+                positions = self._match_tokens(value)
+            elif key == 'version' and op in VERSION_OPERATORS and candidates is None and not remaining:
+                positions = self._match_version(op, value)
+            else:
+                remaining.append((key, op, value))
+                continue
+            candidates = positions if candidates is None else candidates & positions
+            if not candidates:
+                return []
+        if candidates is None:
+            candidates = range(len(self._packages))
+        return [position for position in sorted(candidates)
+                if all(self._check(self._packages[position], key, op, value) for key, op, value in remaining)]
+
+    def _match_field(self, key, op, value):
+        values = self._fields[key]
+        if op == '==':
+            return set(values.get(value, ()))
+        positions = set()
+        for field_value, field_positions in values.items():
+            if value in field_value:
+                positions.update(field_positions)
+        return positions
+
+    def _match_tokens(self, value):
+        positions = None
+        for token in TOKEN_RE.findall(value.lower()):
+            token_positions = self._tokens.get(token, set())
+            positions = token_positions if positions is None else positions & token_positions
+            if not positions:
+                return set()
+        return set(positions or ())
+
+    def _match_version(self, op, value):
+        wanted = parse_version(value)
+        positions = set()
+        for version_list in self._versions.values():
+            if op in ('>=', '>'):
+                start = bisect.bisect_left(version_list, (wanted,))
+                if op == '>':
+                    while start < len(version_list) and version_list[start][0] == wanted:
+                        start += 1
+                positions.update(position for _, position in version_list[start:])
+            elif op in ('<=', '<'):
+                end = bisect.bisect_left(version_list, (wanted,))
+                if op == '<=':
+                    while end < len(version_list) and version_list[end][0] == wanted:
+                        end += 1
+                positions.update(position for _, position in version_list[:end])
+            else:
+                positions.update(position for package_version, position in version_list
+                                 if VERSION_OPERATORS[op](package_version, wanted))
+        return positions
+
+    def _check(self, package, key, op, value):
+        package_value = package.get(key)
+        if key == 'version' and op in VERSION_OPERATORS:
+            try:
+                package_version = versioning.Version(str(package_value))
+            except versioning.InvalidVersion:
+                return False
+            return VERSION_OPERATORS[op](package_version, parse_version(value))
+        if not package_value:
+            return False
+        if op == '==':
+            return str(package_value) == value
+        if op == '=':
+            return value in str(package_value)
+        if op == '~':
+            tokens = set(TOKEN_RE.findall(str(package_value).lower()))
+            return all(token in tokens for token in TOKEN_RE.findall(value.lower()))
+        raise ClientException("Operator '{}' not supported for '{}'".format(op, key))
@@ -16,6 +16,7 @@
 #    under the License.
 
 from osmclient.common.exceptions import ClientException
+from osmclient.common.parallel_gzip import ParallelGzipWriter, is_compressed_file
 import os
 import glob
 import time
@@ -28,10 +29,46 @@ import shutil
 import yaml
 import logging
 
+# Built charms are cached by the hash of their sources, so unchanged layers are not built again
+CHARM_CACHE_DIR = os.getenv('OSM_CHARM_CACHE_DIR',
+                            os.path.join(os.getenv('XDG_CACHE_HOME', os.path.expanduser('~/.cache')),
+                                         'osmclient', 'charms'))
+# Maximum size of the charm cache in MB. A value of 0 disables the cache
+CHARM_CACHE_DEFAULT_SIZE = 2048
+
+
+def _get_charm_cache_size():
+    value = os.getenv('OSM_CHARM_CACHE_SIZE')
+    if value is None:
+        return CHARM_CACHE_DEFAULT_SIZE
+    try:
+        return max(int(value), 0)
+    except ValueError:
+        logging.getLogger('osmclient').warning('Invalid OSM_CHARM_CACHE_SIZE {}, using {} MB'.format(
+            value, CHARM_CACHE_DEFAULT_SIZE))
+        return CHARM_CACHE_DEFAULT_SIZE
+
+
+CHARM_CACHE_MAX_SIZE = _get_charm_cache_size()
+
+
+def _get_source_date_epoch():
+    # mtime of the members of reproducible packages, see https://reproducible-builds.org/specs/source-date-epoch/
+    value = os.getenv('SOURCE_DATE_EPOCH')
+    if value is None:
+        return 0
+    try:
+        return max(int(value), 0)
+    except ValueError:
+        logging.getLogger('osmclient').warning('Invalid SOURCE_DATE_EPOCH {}, using 0'.format(value))
+        return 0
+
+
 class PackageTool(object):
     def __init__(self, client=None):
         self._client = client
         self._logger = logging.getLogger('osmclient')
+        self._charm_tool_version = None
 
     def create(self, package_type, base_directory, package_name, override, image, vdus, vcpu, memory, storage,
                interfaces, vendor, detailed, netslice_subnets, netslice_vlds):
@@ -113,13 +150,17 @@ class PackageTool(object):
                 table.append({"type": desc_type, "path": desc_path, "valid": "ERROR", "error": str(e)})
         return table
 
-    def build(self, package_folder, skip_validation=False, skip_charm_build=False):
+    def build(self, package_folder, skip_validation=False, skip_charm_build=False, reproducible=False,
+              compresslevel=None, compression_threads=None):
         """
             **Creates a .tar.gz file given a package_folder**
 
             :params:
                 - package_folder: is the name of the folder to be packaged
                 - skip_validation: is the flag to validate or not the descriptors on the folder before build
+                - reproducible: build a byte-identical .tar.gz for identical sources (see build_tarfile)
+                - compresslevel: gzip level (0-9). By default, 9 except for already compressed files
+                - compression_threads: number of threads compressing the package
 
             :returns: message result for the build process
         """
@@ -139,7 +180,8 @@ class PackageTool(object):
             else:
                 raise ClientException("No descriptor file found in: {}".format(package_folder))
         charm_list = self.build_all_charms(package_folder, skip_charm_build)
-        return self.build_tarfile(package_folder, charm_list)
+        return self.build_tarfile(package_folder, charm_list, reproducible=reproducible,
+                                  compresslevel=compresslevel, compression_threads=compression_threads)
 
     def calculate_checksum(self, package_folder):
         """
@@ -150,7 +192,7 @@ class PackageTool(object):
             :returns: None
         """
         self._logger.debug("")
-        files = [f for f in glob.glob(package_folder + "/**/*.*", recursive=True) if os.path.isfile(f)]
+        files = sorted(f for f in glob.glob(package_folder + "/**/*.*", recursive=True) if os.path.isfile(f))
         with open("{}/checksums.txt".format(package_folder), "w+") as checksum:
             for file_item in files:
                 if "checksums.txt" in file_item:
@@ -349,15 +391,153 @@ class PackageTool(object):
         if not os.path.exists(os.environ['CHARM_BUILD_DIR']):
             os.makedirs(os.environ['CHARM_BUILD_DIR'])
         src_folder = '{}/{}'.format(os.environ['CHARM_LAYERS_DIR'], build_name)
+        build_folder = os.path.join(os.environ['CHARM_BUILD_DIR'], build_name)
+        cache_key = None
+        if CHARM_CACHE_MAX_SIZE > 0:
+            cache_key = self.charm_cache_key(os.environ['CHARM_LAYERS_DIR'], os.environ['CHARM_INTERFACES_DIR'],
+                                             build_name)
+            if self.charm_cache_restore(cache_key, build_folder):
+                self._logger.verbose("charm {} restored from cache {}".format(src_folder, cache_key))
+                return
         result = subprocess.run(["charm", "build", "{}".format(src_folder)])
-        if result.returncode == 1:
+        if result.returncode != 0:
             raise ClientException("failed to build the charm: {}".format(src_folder))
         self._logger.verbose("charm {} built".format(src_folder))
+        if cache_key:
+            self.charm_cache_store(cache_key, build_folder)
+
+    def get_charm_tool_version(self):
+        """
+        Returns the version string of the charm tool, used as part of the charm cache key
+        """
+        if self._charm_tool_version is None:
+            try:
+                result = subprocess.run(["charm", "version"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+                self._charm_tool_version = result.stdout.decode(errors='replace').strip()
+            except OSError:
+                self._charm_tool_version = ''
+        return self._charm_tool_version
+
+    def charm_layer_dependencies(self, layers_folder, layer_name, found=None):
+        """
+        Returns the set of layers in layers_folder used by layer_name, including itself.
+        Dependencies are the "layer:<name>" entries of the "includes" list of layer.yaml
+        """
+        if found is None:
+            found = set()
+        layer_folder = os.path.join(layers_folder, layer_name)
+        if layer_name in found or not os.path.isdir(layer_folder):
+            return found
+        found.add(layer_name)
+        layer_yaml = os.path.join(layer_folder, 'layer.yaml')
+        if os.path.isfile(layer_yaml):
+            with open(layer_yaml) as f:
+                layer_data = yaml.safe_load(f) or {}
+            for include in layer_data.get('includes', []):
+                if isinstance(include, str) and include.startswith('layer:'):
+                    self.charm_layer_dependencies(layers_folder, include.split(':', 1)[1], found)
+        return found
+
+    def charm_cache_key(self, layers_folder, interfaces_folder, build_name):
+        """
+        Calculates the cache key of a charm: a hash of the sources of the layer, the local layers it
+        includes, the interfaces and the version of the charm tool
+
+        :returns: hex digest
+        """
+        sha = hashlib.sha256()
+        sha.update(self.get_charm_tool_version().encode())
+        source_folders = [os.path.join(layers_folder, layer)
+                          for layer in sorted(self.charm_layer_dependencies(layers_folder, build_name))]
+        if os.path.isdir(interfaces_folder):
+            source_folders.append(interfaces_folder)
+        for source_folder in source_folders:
+            for root, dirs, files in os.walk(source_folder):
+                dirs.sort()
+                for file_name in sorted(files):
+                    file_path = os.path.join(root, file_name)
+                    sha.update(os.path.relpath(file_path, os.path.dirname(source_folder)).encode())
+                    if os.path.islink(file_path):
+                        sha.update(os.readlink(file_path).encode())
+                        continue
+                    with open(file_path, "rb") as f:
+                        for byte_block in iter(lambda: f.read(65536), b""):
+                            sha.update(byte_block)
+        return sha.hexdigest()
 
-    def build_tarfile(self, package_folder, charm_list=None):
+    def charm_cache_restore(self, cache_key, build_folder):
+        """
+        Copies a cached charm build to build_folder
+
+        :returns: True if the charm was found in the cache
+        """
+        cache_entry = os.path.join(CHARM_CACHE_DIR, cache_key)
+        if not os.path.isdir(cache_entry):
+            return False
+        if os.path.exists(build_folder):
+            shutil.rmtree(build_folder)
+        shutil.copytree(cache_entry, build_folder, symlinks=True)
+        # Refresh the modification time, used as last access time for the LRU eviction
+        os.utime(cache_entry)
+        return True
+
+    def charm_cache_store(self, cache_key, build_folder):
+        """
+        Stores a charm build in the cache, evicting the least recently used entries if the cache
+        exceeds CHARM_CACHE_MAX_SIZE
+        """
+        if not os.path.isdir(build_folder):
+            return
+        cache_entry = os.path.join(CHARM_CACHE_DIR, cache_key)
+        temp_entry = "{}.{}.tmp".format(cache_entry, os.getpid())
+        try:
+            os.makedirs(CHARM_CACHE_DIR, exist_ok=True)
+            shutil.copytree(build_folder, temp_entry, symlinks=True)
+            os.rename(temp_entry, cache_entry)
+        except OSError as e:
+            # Another build stored the same entry, or the cache is not writable. Not fatal
+            self._logger.debug("charm cache entry {} not stored: {}".format(cache_key, e))
+            shutil.rmtree(temp_entry, ignore_errors=True)
+            return
+        self.charm_cache_evict()
+
+    def charm_cache_evict(self):
+        """
+        Removes the least recently used entries of the charm cache until it fits in CHARM_CACHE_MAX_SIZE
+        """
+        entries = []
+        total_size = 0
+        for entry in os.listdir(CHARM_CACHE_DIR):
+            entry_path = os.path.join(CHARM_CACHE_DIR, entry)
+            if entry.endswith('.tmp') or not os.path.isdir(entry_path):
+                continue
+            entry_size = 0
+            for root, _, files in os.walk(entry_path):
+                for file_name in files:
+                    file_path = os.path.join(root, file_name)
+                    if not os.path.islink(file_path):
+                        entry_size += os.path.getsize(file_path)
+            entries.append((os.path.getmtime(entry_path), entry_size, entry_path))
+            total_size += entry_size
+        max_size = CHARM_CACHE_MAX_SIZE * 1024 * 1024
+        for _, entry_size, entry_path in sorted(entries):
+            if total_size <= max_size:
+                break
+            self._logger.debug("Evicting charm cache entry {}".format(entry_path))
+            shutil.rmtree(entry_path, ignore_errors=True)
+            total_size -= entry_size
+
+    def build_tarfile(self, package_folder, charm_list=None, reproducible=False, compresslevel=None,
+                      compression_threads=None):
         """
         Creates a .tar.gz file given a package_folder
         params: package_folder is the name of the folder to be packaged
+                reproducible: if True, members are added with normalized owner, permissions and mtime, and
+                              the gzip header carries no timestamp. The mtime used is SOURCE_DATE_EPOCH if set
+                              in the environment, or 0 otherwise
+                compresslevel: gzip compression level, 0 (store only) to 9. If None, level 9 is used, except
+                               for files already compressed (images, archives...), which are stored
+                compression_threads: number of threads compressing the archive. Default: number of CPUs
         returns: .tar.gz name
         """
         self._logger.debug("")
@@ -367,9 +547,8 @@ class PackageTool(object):
             cwd = os.getcwd()
             os.chdir(directory_name)
             self.calculate_checksum(package_name)
-            with tarfile.open("{}.tar.gz".format(package_name), mode='w:gz') as archive:
-                print("Adding File: {}".format(package_name))
-                archive.add('{}'.format(package_name), recursive=True)
+            self.write_tarfile(package_name, "{}.tar.gz".format(package_name), reproducible=reproducible,
+                               compresslevel=compresslevel, compression_threads=compression_threads)
             # return "Created {}.tar.gz".format(package_folder)
             # self.build("{}".format(os.path.basename(package_folder)))
             os.chdir(cwd)
@@ -389,6 +568,50 @@ class PackageTool(object):
                 os.chdir(cwd)
             shutil.rmtree(os.path.join(package_folder, "tmp"))
 
+    def write_tarfile(self, package_name, tar_name, reproducible=False, compresslevel=None,
+                      compression_threads=None):
+        """
+        Writes package_name into the gzip compressed tar_name. See build_tarfile for the parameters
+        """
+        self._logger.debug("")
+        mtime = _get_source_date_epoch() if reproducible else None
+
+        def normalize(tarinfo):
+            tarinfo.uid = tarinfo.gid = 0
+            tarinfo.uname = tarinfo.gname = ''
+            tarinfo.mtime = mtime
+            if tarinfo.isdir() or tarinfo.mode & 0o100:
+                tarinfo.mode = 0o755
+            else:
+                tarinfo.mode = 0o644
+            return tarinfo
+
+        auto_level = compresslevel is None
+        if auto_level:
+            compresslevel = 9
+        with open(tar_name, 'wb') as raw_file, \
+                ParallelGzipWriter(raw_file, compresslevel=compresslevel, threads=compression_threads,
+                                   mtime=mtime) as gzip_file, \
+                tarfile.open(fileobj=gzip_file, mode='w') as archive:
+            print("Adding File: {}".format(package_name))
+            for path in self.sorted_tree(package_name):
+                if auto_level:
+                    gzip_file.set_level(0 if is_compressed_file(path) else compresslevel)
+                archive.add(path, recursive=False, filter=normalize if reproducible else None)
+
+    def sorted_tree(self, path):
+        """
+        Returns path and all the paths below it, walking every directory in sorted order.
+        In each directory files come before sub-folders, so the descriptors are at the head of the package
+        and can be read without decompressing the rest of it
+        """
+        paths = [path]
+        if os.path.isdir(path) and not os.path.islink(path):
+            items = [os.path.join(path, item) for item in os.listdir(path)]
+            for item in sorted(items, key=lambda item: (os.path.isdir(item) and not os.path.islink(item), item)):
+                paths.extend(self.sorted_tree(item))
+        return paths
+
     def create_temp_dir(self, package_folder, charm_list=None):
         """
         Method to create a temporary folder where we can move the files in package_folder
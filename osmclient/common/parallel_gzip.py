@@ -0,0 +1,149 @@
+# Copyright 2020 ETSI OSM
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Multithreaded gzip writer, used to compress package archives
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import os
+import struct
+import time
+import zlib
+
+BLOCK_SIZE = 1024 * 1024
+# Size of the deflate window, the tail of each block is used as dictionary of the next one
+DICT_SIZE = 32 * 1024
+# Magic numbers of formats that do not compress any further
+COMPRESSED_SIGNATURES = (
+    b'\x1f\x8b',                   # gzip
+    b'BZh',                        # bzip2
+    b'\xfd7zXZ\x00',               # xz
+    b'\x28\xb5\x2f\xfd',           # zstd
+    b'\x04\x22\x4d\x18',           # lz4
+    b'PK\x03\x04',                 # zip, jar
+    b'7z\xbc\xaf\x27\x1c',         # 7z
+    b'\x89PNG',                    # png
+    b'\xff\xd8\xff',               # jpeg
+)
+# Files smaller than this are always compressed with the requested level
+MIN_STORED_SIZE = 64 * 1024
+
+
+def is_compressed_file(path):
+    """
+    Returns True if the file at path is big enough and starts with the signature of a compressed format
+    """
+    if not os.path.isfile(path) or os.path.islink(path) or os.path.getsize(path) < MIN_STORED_SIZE:
+        return False
+    with open(path, 'rb') as f:
+        head = f.read(8)
+    return head.startswith(COMPRESSED_SIGNATURES)
+
+
+def _compress_block(data, level, zdict, last):
+    if zdict:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    # A sync flush ends the block on a byte boundary, so independent blocks can be concatenated
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class ParallelGzipWriter(object):
+    """
+    File-like object that writes a standard single-member gzip stream to fileobj.
+    Data is split in blocks of block_size bytes that are deflated by a pool of threads, using the tail of
+    the previous block as dictionary. The compression level can be changed between writes, e.g. to store
+    already compressed payloads without compressing them again.
+    """
+
+    def __init__(self, fileobj, compresslevel=9, threads=None, block_size=BLOCK_SIZE, mtime=None):
+        self._fileobj = fileobj
+        self._level = compresslevel
+        self._threads = threads or os.cpu_count() or 1
+        self._block_size = block_size
+        self._executor = ThreadPoolExecutor(max_workers=self._threads)
+        self._pending = deque()
+        self._buffer = bytearray()
+        self._zdict = b''
+        self._crc = 0
+        self._size = 0
+        self._closed = False
+        if mtime is None:
+            mtime = int(time.time())
+        if compresslevel == 9:
+            extra_flags = 2
+        elif compresslevel == 1:
+            extra_flags = 4
+        else:
+            extra_flags = 0
+        # Magic, deflate method, no flags, mtime, extra flags, OS unknown
+        self._fileobj.write(struct.pack('<BBBBLBB', 0x1f, 0x8b, 8, 0, mtime & 0xffffffff, extra_flags, 255))
+
+    def set_level(self, compresslevel):
+        """
+        Changes the compression level for the data written from now on
+        """
+        if compresslevel != self._level:
+            if self._buffer:
+                self._submit(last=False)
+            self._level = compresslevel
+
+    def write(self, data):
+        if self._closed:
+            raise ValueError("write to closed file")
+        self._crc = zlib.crc32(data, self._crc)
+        self._size += len(data)
+        self._buffer += data
+        while len(self._buffer) >= self._block_size:
+            self._submit(last=False)
+        return len(data)
+
+    def tell(self):
+        return self._size
+
+    def flush(self):
+        pass
+
+    def _submit(self, last):
+        block = bytes(self._buffer[:self._block_size]) if not last else bytes(self._buffer)
+        del self._buffer[:len(block)]
+        zdict = self._zdict if self._level else b''
+        self._pending.append(self._executor.submit(_compress_block, block, self._level, zdict, last))
+        self._zdict = block[-DICT_SIZE:] if len(block) >= DICT_SIZE else (self._zdict + block)[-DICT_SIZE:]
+        # Limit the number of blocks in memory waiting to be written
+        while len(self._pending) > 2 * self._threads:
+            self._fileobj.write(self._pending.popleft().result())
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._submit(last=True)
+            while self._pending:
+                self._fileobj.write(self._pending.popleft().result())
+            self._fileobj.write(struct.pack('<LL', self._crc & 0xffffffff, self._size & 0xffffffff))
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,212 @@
+# Copyright 2020 ETSI OSM
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Static HTTP server for the repositories created by "osm repo-index"
+"""
+
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from io import BytesIO
+from urllib.parse import unquote
+import gzip
+import logging
+import os
+import posixpath
+import re
+import socketserver
+import threading
+
+# Files served compressed to the clients accepting gzip
+GZIP_FILES = ('index.yaml', 'index.json')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# Suffixes of incomplete downloads, which are not served
+HIDDEN_SUFFIXES = ('.part', '.part.meta')
+
+
+class RepoServer(socketserver.ThreadingMixIn, HTTPServer):
+    """
+    HTTP server of the repository in directory, answering each request in its own thread
+    """
+
+    daemon_threads = True
+
+    def __init__(self, server_address, directory):
+        self.directory = os.path.abspath(directory)
+        super().__init__(server_address, RepoRequestHandler)
+
+
+class RepoRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Request handler with Range, ETag/Last-Modified validation, gzip for the index files and sendfile transfers.
+    Directories are listed as by SimpleHTTPRequestHandler. Files are served from the directory of the
+    RepoServer, except dot-files and incomplete downloads
+    """
+
+    protocol_version = 'HTTP/1.1'
+    # Compressed index files, keyed by path, mtime and size
+    _gzip_cache = {}
+    _gzip_cache_lock = threading.Lock()
+
+    def do_GET(self):
+        self.serve(send_body=True)
+
+    def do_HEAD(self):
+        self.serve(send_body=False)
+
+    def log_message(self, format, *args):
+        logging.getLogger('osmclient').info('%s - %s', self.address_string(), format % args)
+
+    def translate_path(self, path):
+        # As SimpleHTTPRequestHandler.translate_path, which only takes a directory other than the
+        # current one since python 3.7
+        path = path.split('?', 1)[0].split('#', 1)[0]
+        trailing_slash = path.rstrip().endswith('/')
+        path = posixpath.normpath(unquote(path))
+        result = self.server.directory
+        for word in filter(None, path.split('/')):
+            if os.path.dirname(word) or word in (os.curdir, os.pardir):
+                continue
+            result = os.path.join(result, word)
+        if trailing_slash:
+            result += '/'
+        return result
+
+    def is_hidden(self, path):
+        """
+        True for paths that are not part of the repository: dot-files such as the index manifest, with the
+        source paths of the packages, and incomplete downloads
+        """
+        names = os.path.relpath(path, self.server.directory).split(os.sep)
+        return any(name.startswith('.') and name not in (os.curdir, os.pardir) for name in names) or \
+            path.endswith(HIDDEN_SUFFIXES)
+
+    def serve(self, send_body):
+        path = self.translate_path(self.path)
+        if self.is_hidden(path):
+            self.send_error(HTTPStatus.NOT_FOUND, 'File not found')
+            return
+        if os.path.isdir(path) or not os.path.isfile(path):
+            if send_body:
+                return super().do_GET()
+            return super().do_HEAD()
+        stat_result = os.stat(path)
+        etag = '"{:x}-{:x}"'.format(stat_result.st_mtime_ns, stat_result.st_size)
+        compressed = None
+        if os.path.basename(path) in GZIP_FILES and 'gzip' in self.headers.get('Accept-Encoding', '') \
+                and 'Range' not in self.headers:
+            compressed = self.gzip_content(path, stat_result)
+            etag = '{}-gz"'.format(etag[:-1])
+        if self.not_modified(etag, stat_result):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_validators(etag, stat_result)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if compressed is not None:
+            self.send_response(HTTPStatus.OK)
+            self.send_validators(etag, stat_result)
+            self.send_header('Content-Type', self.guess_type(path))
+            self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(compressed)))
+            self.end_headers()
+            if send_body:
+                self.wfile.write(compressed)
+            return
+        size = stat_result.st_size
+        start, end = 0, size - 1
+        byte_range = self.headers.get('Range')
+        if byte_range and self.headers.get('If-Range', etag) == etag:
+            match = RANGE_RE.match(byte_range.strip())
+            # Multiple ranges are not supported, the whole file is sent instead
+            if match and (match.group(1) or match.group(2)):
+                if match.group(1):
+                    start = int(match.group(1))
+                    if match.group(2):
+                        end = min(int(match.group(2)), size - 1)
+                else:
+                    start = max(size - int(match.group(2)), 0)
+                if start >= size or start > end:
+                    self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                    self.send_header('Content-Range', 'bytes */{}'.format(size))
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_response(HTTPStatus.PARTIAL_CONTENT)
+                self.send_header('Content-Range', 'bytes {}-{}/{}'.format(start, end, size))
+            else:
+                self.send_response(HTTPStatus.OK)
+        else:
+            self.send_response(HTTPStatus.OK)
+        self.send_validators(etag, stat_result)
+        self.send_header('Content-Type', self.guess_type(path))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        if send_body and end >= start:
+            with open(path, 'rb') as f:
+                # The file is copied by the kernel to the socket, without going through user space
+                self.connection.sendfile(f, offset=start, count=end - start + 1)
+
+    def send_validators(self, etag, stat_result):
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', formatdate(stat_result.st_mtime, usegmt=True))
+        self.send_header('Vary', 'Accept-Encoding')
+
+    def not_modified(self, etag, stat_result):
+        if 'If-None-Match' in self.headers:
+            return etag in [tag.strip() for tag in self.headers['If-None-Match'].split(',')] or \
+                self.headers['If-None-Match'].strip() == '*'
+        if 'If-Modified-Since' in self.headers:
+            try:
+                since = parsedate_to_datetime(self.headers['If-Modified-Since'])
+            except (TypeError, ValueError, IndexError):
+                return False
+            return since is not None and int(stat_result.st_mtime) <= since.timestamp()
+        return False
+
+    def gzip_content(self, path, stat_result):
+        key = (path, stat_result.st_mtime_ns, stat_result.st_size)
+        with self._gzip_cache_lock:
+            if key in self._gzip_cache:
+                return self._gzip_cache[key]
+        buffer = BytesIO()
+        # mtime=0 keeps the compressed content, and so the ETag, stable across restarts
+        with open(path, 'rb') as f, gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=6, mtime=0) as gz:
+            gz.write(f.read())
+        compressed = buffer.getvalue()
+        with self._gzip_cache_lock:
+            for old_key in [k for k in self._gzip_cache if k[0] == path]:
+                del self._gzip_cache[old_key]
+            self._gzip_cache[key] = compressed
+        return compressed
+
+
+def serve(directory, host='0.0.0.0', port=8000):
+    """
+    Serves directory over HTTP until interrupted
+    params:
+        directory: folder with the repository
+        host: address to bind
+        port: port to bind
+    """
+    with RepoServer((host, port), directory) as server:
+        print('Serving repository {} at http://{}:{}'.format(server.directory, host, server.server_address[1]))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,95 @@
+# Copyright 2020 ETSI OSM
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Retry policy for transient failures of the NBI: exponential backoff with jitter and a retry budget
+"""
+
+from email.utils import parsedate_to_datetime
+import logging
+import os
+import random
+import time
+
+
+
+def _get_env(name, default, convert=int):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return max(convert(value), 0)
+    except ValueError:
+        logging.getLogger('osmclient').warning('Invalid {} {}, using {}'.format(name, value, default))
+        return default
+
+
+# Maximum number of retries of a request
+RETRIES = _get_env('OSM_RETRIES', 3)
+# Base delay in seconds, doubled on every retry
+RETRY_BACKOFF = _get_env('OSM_RETRY_BACKOFF', 0.5, float)
+# Maximum delay in seconds between two attempts. A longer Retry-After is not waited for
+RETRY_MAX_DELAY = _get_env('OSM_RETRY_MAX_DELAY', 30.0, float)
+# Maximum number of retries of all the requests of a command, so that an NBI that is down is not
+# retried over and over by a batch run
+RETRY_BUDGET = _get_env('OSM_RETRY_BUDGET', 20)
+
+
+class RetryPolicy(object):
+
+    def __init__(self, retries=RETRIES, backoff=RETRY_BACKOFF, max_delay=RETRY_MAX_DELAY, budget=RETRY_BUDGET):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.budget = budget
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Returns the seconds to wait before the retry number attempt (starting at 0) of a request, or None if
+        the request must not be retried. The retry is charged to the budget
+        params:
+            attempt: number of retries already done for the request
+            retry_after: seconds requested by the server with a Retry-After header, or None
+        """
+        if attempt >= self.retries or self.budget <= 0:
+            return None
+        if retry_after is not None and retry_after > self.max_delay:
+            return None
+        # "Full jitter": a random delay up to the exponential backoff, so that the clients that failed
+        # at the same time do not retry at the same time
+        delay = random.uniform(0, min(self.max_delay, self.backoff * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        self.budget -= 1
+        return delay
+
+
+def parse_retry_after(value):
+    """
+    Returns the seconds of a Retry-After header, given as delay-seconds or as an HTTP-date, or None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if date is None:
+        return None
+    return max(date.timestamp() - time.time(), 0.0)
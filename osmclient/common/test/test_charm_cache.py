@@ -0,0 +1,98 @@
+# Copyright 2020 ETSI OSM
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from unittest import mock
+import verboselogs
+from osmclient.common import package_tool
+from osmclient.common.exceptions import ClientException
+
+verboselogs.install()
+
+
+class TestCharmCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.directory, 'cache')
+        self.package = os.path.join(self.directory, 'package')
+        os.makedirs(os.path.join(self.package, 'charms', 'layers', 'simple'))
+        with open(os.path.join(self.package, 'charms', 'layers', 'simple', 'layer.yaml'), 'w') as f:
+            f.write('includes: ["layer:basic"]\n')
+        self.tool = package_tool.PackageTool()
+        self.tool._charm_tool_version = 'charm 2.8.2'
+        self.patchers = [mock.patch.object(package_tool, 'CHARM_CACHE_DIR', self.cache_dir),
+                         mock.patch.object(package_tool, 'CHARM_CACHE_MAX_SIZE', 1),
+                         # charm_build sets the environment of the charm tool
+                         mock.patch.dict(os.environ)]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        shutil.rmtree(self.directory)
+
+    def charm_build(self, returncode=0, size=10):
+        def run(command):
+            build_folder = os.path.join(self.package, 'charms', 'builds', 'simple')
+            os.makedirs(build_folder, exist_ok=True)
+            with open(os.path.join(build_folder, 'metadata.yaml'), 'wb') as f:
+                f.write(b'x' * size)
+            return subprocess.CompletedProcess(command, returncode)
+        with mock.patch.object(package_tool.subprocess, 'run', side_effect=run) as run_mock:
+            self.tool.charm_build(self.package, 'simple')
+        return run_mock.call_count
+
+    def test_hit_and_miss(self):
+        self.assertEqual(self.charm_build(), 1)
+        shutil.rmtree(os.path.join(self.package, 'charms', 'builds'))
+        self.assertEqual(self.charm_build(), 0)
+        self.assertTrue(os.path.isfile(os.path.join(self.package, 'charms', 'builds', 'simple', 'metadata.yaml')))
+        with open(os.path.join(self.package, 'charms', 'layers', 'simple', 'layer.yaml'), 'a') as f:
+            f.write('options: {}\n')
+        self.assertEqual(self.charm_build(), 1)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+
+    def test_failed_build_not_cached(self):
+        self.assertRaises(ClientException, self.charm_build, returncode=2)
+        self.assertFalse(os.path.exists(self.cache_dir) and os.listdir(self.cache_dir))
+
+    def test_evict(self):
+        self.charm_build(size=700 * 1024)
+        first = os.listdir(self.cache_dir)
+        os.utime(os.path.join(self.cache_dir, first[0]), (0, 0))
+        with open(os.path.join(self.package, 'charms', 'layers', 'simple', 'layer.yaml'), 'a') as f:
+            f.write('options: {}\n')
+        self.charm_build(size=700 * 1024)
+        entries = os.listdir(self.cache_dir)
+        self.assertEqual(len(entries), 1)
+        self.assertNotEqual(entries, first)
+
+    def test_invalid_cache_size(self):
+        with mock.patch.dict(os.environ, {'OSM_CHARM_CACHE_SIZE': 'big'}):
+            self.assertEqual(package_tool._get_charm_cache_size(), package_tool.CHARM_CACHE_DEFAULT_SIZE)
+        with mock.patch.dict(os.environ, {'OSM_CHARM_CACHE_SIZE': '0'}):
+            self.assertEqual(package_tool._get_charm_cache_size(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# Copyright 2020 ETSI OSM
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import os
+import tempfile
+import unittest
+import verboselogs
+from osmclient.benchmarks.mock_nbi import MockNbi
+from osmclient.common import retry
+from osmclient.sol005.http import Http
+
+verboselogs.install()
+
+
+class TestChunkedUpload(unittest.TestCase):
+
+    def setUp(self):
+        self.nbi = MockNbi(ns=0, vnf=0, vnfd=0, vim=0).start()
+        self.addCleanup(self.nbi.stop)
+        self.http = Http(self.nbi.url, upload_chunk_size=1000, no_cache=True)
+        self.http._retry_policy = retry.RetryPolicy(retries=2, backoff=0)
+        package = tempfile.NamedTemporaryFile(suffix='.tar.gz', delete=False)
+        package.write(os.urandom(2500))
+        package.close()
+        self.package = package.name
+        self.addCleanup(os.remove, self.package)
+
+    def upload(self):
+        return self.http.send_file_chunks('/vnfpkgm/v1/vnf_packages_content', self.package, skip_query_admin=True)
+
+    def test_chunks(self):
+        http_code, _ = self.upload()
+        self.assertEqual(http_code, 201)
+        self.assertEqual(self.nbi.uploaded, 2500)
+        ranges = [content_range for content_range, _ in self.nbi.chunks]
+        self.assertEqual(ranges, ['bytes 0-999/2500', 'bytes 1000-1999/2500', 'bytes 2000-2499/2500'])
+        transaction_ids = [transaction_id for _, transaction_id in self.nbi.chunks]
+        # The Transaction-Id returned for the first chunk is sent with the next ones
+        self.assertIsNone(transaction_ids[0])
+        self.assertIsNotNone(transaction_ids[1])
+        self.assertEqual(transaction_ids[1], transaction_ids[2])
+
+    def test_chunk_retry(self):
+        self.nbi.fail_chunks = 1
+        with self.assertLogs('osmclient', 'WARNING'):
+            http_code, _ = self.upload()
+        self.assertEqual(http_code, 201)
+        ranges = [content_range for content_range, _ in self.nbi.chunks]
+        # The failed chunk is sent again, whole
+        self.assertEqual(ranges, ['bytes 0-999/2500', 'bytes 0-999/2500', 'bytes 1000-1999/2500',
+                                  'bytes 2000-2499/2500'])
+        self.assertEqual(self.nbi.uploaded, 3500)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+# Copyright 2020 ETSI OSM
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import verboselogs
+from osmclient.common.exceptions import ClientException
+from osmclient.common.repo_server import RepoRequestHandler, RepoServer
+from osmclient.sol005.http import Http
+
+verboselogs.install()
+
+
+class NoRangeRequestHandler(RepoRequestHandler):
+    # Announces Accept-Ranges, but answers every GET with the whole file
+
+    def do_GET(self):
+        del self.headers['Range']
+        super().do_GET()
+
+
+class TestDownload(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.content = os.urandom(100000)
+        with open(os.path.join(self.directory, 'pkg.tar.gz'), 'wb') as f:
+            f.write(self.content)
+        self.server = RepoServer(('127.0.0.1', 0), self.directory)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.http = Http('http://127.0.0.1:{}'.format(self.server.server_address[1]), no_cache=True)
+        self.http.MIN_SEGMENT_SIZE = 10000
+        self.filename = os.path.join(self.directory, 'downloaded.tar.gz')
+        self.part = '{}.part'.format(self.filename)
+
+    def download(self, segments=1):
+        return self.http.download_cmd('/pkg.tar.gz', self.filename, segments=segments, skip_query_admin=True)
+
+    def downloaded(self):
+        with open(self.filename, 'rb') as f:
+            return f.read()
+
+    def write_part(self, content, validator):
+        with open(self.part, 'wb') as f:
+            f.write(content)
+        with open('{}.meta'.format(self.part), 'w') as f:
+            json.dump({'validator': validator, 'size': len(self.content)}, f)
+
+    def etag(self):
+        self.download()
+        os.remove(self.filename)
+        return '"{:x}-{:x}"'.format(os.stat(os.path.join(self.directory, 'pkg.tar.gz')).st_mtime_ns,
+                                    len(self.content))
+
+    def test_fresh(self):
+        self.assertEqual(self.download(), 200)
+        self.assertEqual(self.downloaded(), self.content)
+        self.assertFalse(os.path.exists(self.part))
+        self.assertFalse(os.path.exists('{}.meta'.format(self.part)))
+
+    def test_resume(self):
+        self.write_part(self.content[:30000], self.etag())
+        self.assertEqual(self.download(), 206)
+        self.assertEqual(self.downloaded(), self.content)
+        self.assertFalse(os.path.exists('{}.meta'.format(self.part)))
+
+    def test_resume_without_validator(self):
+        with open(self.part, 'wb') as f:
+            f.write(b'x' * 30000)
+        self.assertEqual(self.download(), 200)
+        self.assertEqual(self.downloaded(), self.content)
+
+    def test_stale_validator(self):
+        self.write_part(b'x' * 30000, '"changed"')
+        self.assertEqual(self.download(), 200)
+        self.assertEqual(self.downloaded(), self.content)
+
+    def test_complete_part(self):
+        self.write_part(self.content, self.etag())
+        self.assertEqual(self.download(), 416)
+        self.assertEqual(self.downloaded(), self.content)
+
+    def test_longer_part(self):
+        self.write_part(self.content + b'x', self.etag())
+        self.assertEqual(self.download(), 200)
+        self.assertEqual(self.downloaded(), self.content)
+
+    def test_error(self):
+        self.assertRaises(ClientException, self.http.download_cmd, '/missing.tar.gz', self.filename,
+                          skip_query_admin=True)
+        self.assertEqual([name for name in os.listdir(self.directory) if 'downloaded' in name], [])
+
+    def test_segments(self):
+        self.assertEqual(self.download(segments=4), 200)
+        self.assertEqual(self.downloaded(), self.content)
+
+    def test_segments_range_ignored(self):
+        self.server.RequestHandlerClass = NoRangeRequestHandler
+        self.assertRaises(ClientException, self.download, 4)
+        self.assertFalse(os.path.exists(self.part))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+# Copyright 2020 ETSI OSM
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import importlib
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from osmclient.common import http_cache
+from osmclient.common.http_cache import HttpCache
+
+
+class TestHttpCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_put(self):
+        cache = HttpCache(self.directory, max_size=1000)
+        self.assertEqual(cache.get('key'), (None, None))
+        cache.put('key', {'etag': '"1"'}, b'{"a": 1}\n')
+        self.assertEqual(cache.get('key'), ({'etag': '"1"'}, b'{"a": 1}\n'))
+        self.assertEqual(cache.get('other'), (None, None))
+
+    def test_evict_least_recently_used(self):
+        cache = HttpCache(self.directory, max_size=1000)
+        cache.put('old', {'etag': '"1"'}, b'x' * 400)
+        cache.put('used', {'etag': '"2"'}, b'x' * 400)
+        for i, key in enumerate(('used', 'old')):
+            os.utime(cache._path(key), (i, i))
+        cache.get('old')
+        cache.put('new', {'etag': '"3"'}, b'x' * 400)
+        self.assertEqual(cache.get('used'), (None, None))
+        self.assertIsNotNone(cache.get('old')[1])
+        self.assertIsNotNone(cache.get('new')[1])
+
+    def test_too_big(self):
+        cache = HttpCache(self.directory, max_size=10)
+        cache.put('key', {'etag': '"1"'}, b'x' * 100)
+        self.assertEqual(cache.get('key'), (None, None))
+
+    def test_invalid_size(self):
+        with mock.patch.dict(os.environ, {'OSM_HTTP_CACHE_SIZE': '1G'}):
+            self.addCleanup(importlib.reload, http_cache)
+            with self.assertLogs('osmclient', 'WARNING'):
+                importlib.reload(http_cache)
+        self.assertEqual(http_cache.CACHE_MAX_SIZE, http_cache.CACHE_DEFAULT_SIZE)
+
+
+if __name__ == '__main__':
+    unittest.main()
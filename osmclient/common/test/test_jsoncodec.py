@@ -0,0 +1,55 @@
+# Copyright 2020 ETSI OSM
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import importlib
+import os
+import unittest
+from unittest import mock
+from osmclient.common import jsoncodec
+from osmclient.common.exceptions import ClientException
+
+
+class TestJsonCodec(unittest.TestCase):
+
+    def tearDown(self):
+        jsoncodec.set_codec()
+
+    def test_codecs(self):
+        for name in jsoncodec.CODECS:
+            try:
+                jsoncodec.set_codec(name)
+            except ClientException:
+                continue
+            self.assertEqual(jsoncodec.codec, name)
+            self.assertEqual(jsoncodec.loads(b'{"name": "ns\\u00f1", "vnfs": [1, 2.5, null]}'),
+                             {'name': 'nsñ', 'vnfs': [1, 2.5, None]})
+            self.assertEqual(jsoncodec.loads(jsoncodec.dumps({'password': 'secret'})), {'password': 'secret'})
+            self.assertIsInstance(jsoncodec.dumps([]), str)
+            self.assertEqual(jsoncodec.loads(jsoncodec.dumps({1: 'vnf'})), {'1': 'vnf'})
+
+    def test_unknown_codec(self):
+        self.assertRaises(ClientException, jsoncodec.set_codec, 'yaml')
+
+    def test_invalid_environment(self):
+        with mock.patch.dict(os.environ, {'OSM_JSON_CODEC': 'yaml'}):
+            with self.assertLogs('osmclient', 'WARNING'):
+                importlib.reload(jsoncodec)
+        self.assertEqual(jsoncodec.codec, 'json')
+
+
+if __name__ == '__main__':
+    unittest.main()
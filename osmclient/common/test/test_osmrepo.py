@@ -0,0 +1,180 @@
+# Copyright 2020 ETSI OSM
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+from osmclient.common.exceptions import ClientException
+from osmclient.sol005 import osmrepo
+from osmclient.sol005.osmrepo import OSMRepo
+
+
+class TestOSMRepoPackageIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.repo = OSMRepo(client=mock.Mock())
+        self.repo.list = mock.Mock(return_value=[{'name': 'repo1', 'url': 'http://repo1'},
+                                                 {'name': 'repo2', 'url': 'http://repo2'}])
+        indexes = {
+            'http://repo1': {'vnf_packages': {'cirros_vnf': {'1.0': {'name': 'cirros_vnf'}, 'latest': '1.0'}}},
+            'http://repo2': {'vnf_packages': {'hackfest_vnf': {'1.1': {'name': 'hackfest_vnf'}, 'latest': '1.1'}}},
+        }
+        self.repo.get_repo_index = mock.Mock(side_effect=indexes.get)
+
+    def test_memo(self):
+        package_index = self.repo.package_index('vnf', 'repo1')
+        self.assertIs(self.repo.package_index('vnf', 'repo1'), package_index)
+        self.assertEqual(self.repo.list.call_count, 1)
+        self.assertEqual([p['name'] for p in self.repo.pkg_list('vnf', repo='repo1')], ['cirros_vnf'])
+        self.assertEqual(self.repo.list.call_count, 1)
+
+    def test_repository_not_found(self):
+        self.repo.pkg_list('vnf', repo='repo2')
+        self.assertRaises(ClientException, self.repo.pkg_list, 'vnf', repo='repo3')
+
+
+class TestOSMRepoGetRepoIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(osmrepo, 'REPO_CACHE_DIR', self.cache_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.cache_dir.cleanup)
+        self.session = mock.Mock()
+        self.session.get.side_effect = self.get
+        self.json_status = 404
+
+    def get(self, url, headers=None, timeout=None):
+        if url.endswith('index.json'):
+            return mock.Mock(status_code=self.json_status)
+        return mock.Mock(status_code=200, content=b'vnf_packages: {}\n', headers={})
+
+    def repo(self):
+        repo = OSMRepo(client=mock.Mock())
+        repo.get_session = mock.Mock(return_value=self.session)
+        return repo
+
+    def test_missing_json_index(self):
+        self.assertEqual(self.repo().get_repo_index('http://repo1'), {'vnf_packages': {}})
+        self.assertEqual(self.session.get.call_count, 2)
+        self.assertEqual(self.repo().get_repo_index('http://repo1'), {'vnf_packages': {}})
+        self.assertEqual(self.session.get.call_count, 3)
+        self.assertTrue(self.session.get.call_args[0][0].endswith('index.yaml'))
+
+    def test_missing_json_index_expires(self):
+        self.repo().get_repo_index('http://repo1')
+        with mock.patch.object(osmrepo, 'MISSING_INDEX_TTL', 0):
+            self.repo().get_repo_index('http://repo1')
+        self.assertEqual(self.session.get.call_count, 4)
+
+    def test_forbidden_json_index(self):
+        self.json_status = 403
+        self.assertEqual(self.repo().get_repo_index('http://repo1'), {'vnf_packages': {}})
+        self.assertEqual(self.session.get.call_count, 2)
+
+    def test_corrupt_validators(self):
+        self.repo().get_repo_index('http://repo1')
+        cache_dir = os.path.join(self.cache_dir.name, os.listdir(self.cache_dir.name)[0])
+        with open(os.path.join(cache_dir, 'validators.json'), 'w') as f:
+            f.write('{"index.json": ')
+        with self.assertLogs('osmclient', 'WARNING'):
+            self.assertEqual(self.repo().get_repo_index('http://repo1'), {'vnf_packages': {}})
+
+
+class TestOSMRepoSync(unittest.TestCase):
+
+    def test_path_outside_destination(self):
+        repo = OSMRepo(client=mock.Mock())
+        repo.list = mock.Mock(return_value=[{'name': 'repo1', 'url': 'http://repo1'}])
+        repo.get_repo_index = mock.Mock(return_value={'vnf_packages': {'cirros_vnf': {
+            '1.0': {'path': '/vnf/cirros_vnf/1.0/cirros_vnf-1.0.tar.gz', 'checksum': 'a'},
+            '2.0': {'path': '/../../cirros_vnf-2.0.tar.gz', 'checksum': 'b'},
+            'latest': '2.0'}}})
+        repo.download_file = mock.Mock()
+        with tempfile.TemporaryDirectory() as destination:
+            self.assertRaises(ClientException, repo.repo_sync, 'repo1', destination)
+            file_name = '{}/vnf/cirros_vnf/1.0/cirros_vnf-1.0.tar.gz'.format(destination)
+            repo.download_file.assert_any_call('http://repo1/vnf/cirros_vnf/1.0/cirros_vnf-1.0.tar.gz',
+                                               file_name, checksum='a', resume=True)
+            repo.download_file.assert_any_call('http://repo1/vnf/cirros_vnf/1.0/metadata.yaml',
+                                               '{}/vnf/cirros_vnf/1.0/metadata.yaml'.format(destination))
+            self.assertEqual(repo.download_file.call_count, 2)
+            self.assertEqual(list(repo.load_index(destination)['vnf_packages']['cirros_vnf']), ['1.0', 'latest'])
+
+
+class TestOSMRepoIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.origin = os.path.join(self.directory.name, 'origin')
+        self.destination = os.path.join(self.directory.name, 'repository')
+        self.artifact = os.path.join(self.origin, 'simple_vnf')
+        os.makedirs(os.path.join(self.artifact, 'charms', 'layers', 'simple'))
+        with open(os.path.join(self.artifact, 'simple_vnfd.yaml'), 'w') as f:
+            f.write('vnfd: {}\n')
+        self.builds = 0
+
+    def process_artifact(self, path, source):
+        # As PackageTool.build, which writes the built charms and checksums.txt in the package folder
+        self.builds += 1
+        os.makedirs(os.path.join(path, 'charms', 'builds', 'simple'), exist_ok=True)
+        with open(os.path.join(path, 'charms', 'builds', 'simple', 'metadata.yaml'), 'w') as f:
+            f.write('build {}\n'.format(self.builds))
+        with open(os.path.join(path, 'checksums.txt'), 'w') as f:
+            f.write('build {}\n'.format(self.builds))
+        package = os.path.join(self.directory.name, 'simple_vnf.tar.gz')
+        with open(package, 'wb') as f:
+            f.write(b'package')
+        return package, 'vnf', {'id': 'simple_vnf', 'name': 'simple_vnf', 'version': '1.0',
+                                'path': '/vnf/simple_vnf/1.0/simple_vnf-1.0.tar.gz', 'checksum': 'a'}
+
+    def test_unchanged_artifact(self):
+        repo = OSMRepo()
+        with mock.patch.object(repo, 'process_artifact', side_effect=self.process_artifact):
+            repo.repo_index(self.origin, self.destination)
+            self.assertEqual(self.builds, 1)
+            repo.repo_index(self.origin, self.destination)
+            self.assertEqual(self.builds, 1)
+            with open(os.path.join(self.artifact, 'simple_vnfd.yaml'), 'a') as f:
+                f.write('# changed\n')
+            repo.repo_index(self.origin, self.destination)
+            self.assertEqual(self.builds, 2)
+
+    def test_versions_not_pep440(self):
+        repo = OSMRepo(client=mock.Mock())
+        repo.list = mock.Mock(return_value=[{'name': 'repo1', 'url': 'http://repo1'}])
+        repo.get_repo_index = mock.Mock(return_value={'vnf_packages': {'cirros_vnf': {
+            '1.0.0-osm': {'path': '/vnf/cirros_vnf/1.0.0-osm/cirros_vnf-1.0.0-osm.tar.gz', 'checksum': 'a'},
+            '2.0.0-osm': {'path': '/vnf/cirros_vnf/2.0.0-osm/cirros_vnf-2.0.0-osm.tar.gz', 'checksum': 'b'},
+            'latest': '2.0.0-osm'}}})
+
+        def download_file(url, file_name, checksum=None, resume=False):
+            if '2.0.0-osm' in url and not self.available:
+                raise ClientException('Package not found')
+
+        repo.download_file = mock.Mock(side_effect=download_file)
+        with tempfile.TemporaryDirectory() as destination:
+            self.available = False
+            self.assertRaises(ClientException, repo.repo_sync, 'repo1', destination)
+            self.assertEqual(repo.load_index(destination)['vnf_packages']['cirros_vnf']['latest'], '1.0.0-osm')
+            self.available = True
+            repo.repo_sync('repo1', destination)
+            self.assertEqual(repo.load_index(destination)['vnf_packages']['cirros_vnf']['latest'], '2.0.0-osm')
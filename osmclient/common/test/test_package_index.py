@@ -0,0 +1,86 @@
+# Copyright 2020 ETSI OSM
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import unittest
+from osmclient.common.exceptions import ClientException
+from osmclient.common.package_index import PackageIndex
+
+
+def package(name, version, vendor='OSM', description=''):
+    return {'name': name, 'version': version, 'vendor': vendor, 'description': description,
+            'repository': 'repo'}
+
+
+class TestPackageIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = PackageIndex([
+            package('cirros_vnf', '1.0', description='Simple cirros VNF'),
+            package('cirros_vnf', '1.2'),
+            package('cirros_vnf', '2.0rc1'),
+            package('cirros_vnf', '2.0', vendor='ETSI'),
+            package('hackfest_vnf', '1.1', description='Hackfest basic VNF'),
+        ])
+
+    def versions(self, filter):
+        return [(p['name'], p['version']) for p in self.index.search(filter)]
+
+    def test_substring(self):
+        assert len(self.index.search('name=cirros')) == 4
+        assert len(self.index.search('description=VNF')) == 2
+        assert self.index.search('name=nothing') == []
+
+    def test_exact_and_combined(self):
+        assert self.versions('name==cirros_vnf&vendor==ETSI') == [('cirros_vnf', '2.0')]
+        assert self.versions('name==cirros') == []
+        assert self.versions('description~vnf hackfest') == [('hackfest_vnf', '1.1')]
+
+    def test_versions(self):
+        assert self.versions('version>=1.2') == [('cirros_vnf', '1.2'), ('cirros_vnf', '2.0rc1'),
+                                                 ('cirros_vnf', '2.0')]
+        assert self.versions('name=cirros&version>1.2&version<2.0') == [('cirros_vnf', '2.0rc1')]
+        assert self.versions('version<=1.1') == [('cirros_vnf', '1.0'), ('hackfest_vnf', '1.1')]
+        assert [str(v) for v in self.index.versions('cirros_vnf')] == ['1.0', '1.2', '2.0rc1', '2.0']
+
+    def test_invalid(self):
+        self.assertRaises(ClientException, self.index.search, 'name')
+        self.assertRaises(ClientException, self.index.search, 'version>=latest')
+
+    def test_resolve(self):
+        def resolve(version, filter=None):
+            pkg = self.index.resolve('cirros_vnf', version, filter=filter)
+            return pkg and pkg['version']
+        assert resolve('latest') == '2.0'
+        assert resolve('1.2') == '1.2'
+        assert resolve('1.2.0') == '1.2'
+        assert resolve('3.0') is None
+        assert resolve('>=1.0,<2') == '1.2'
+        assert resolve('==2.0rc1') == '2.0rc1'
+        assert resolve('>1.2,<2.1,!=2.0') == '2.0rc1'
+        assert resolve('>2.5') is None
+        assert resolve('latest', filter='vendor==OSM') == '1.2'
+        self.assertRaises(ClientException, resolve, '>=x')
+
+    def test_resolve_unparsed_versions(self):
+        index = PackageIndex([package('ubuntu_vnf', 'stable'), package('ubuntu_vnf', 'beta')])
+        assert index.resolve('ubuntu_vnf')['version'] == 'stable'
+        assert index.resolve('ubuntu_vnf', 'beta')['version'] == 'beta'
+        assert index.resolve('ubuntu_vnf', '>=1.0') is None
+        latest = dict(package('ubuntu_vnf', 'beta'), latest=True)
+        index = PackageIndex([package('ubuntu_vnf', 'stable'), latest])
+        assert index.resolve('ubuntu_vnf') is latest
+        assert index.resolve('ubuntu_vnf', filter='vendor==ETSI') is None
@@ -0,0 +1,71 @@
+# Copyright 2020 ETSI OSM
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+from unittest import mock
+import verboselogs
+from osmclient.common import package_tool
+
+verboselogs.install()
+
+
+class TestReproducibleBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.package = os.path.join(self.directory, 'simple_vnf')
+        os.makedirs(os.path.join(self.package, 'cloud_init'))
+        with open(os.path.join(self.package, 'simple_vnfd.yaml'), 'w') as f:
+            f.write('vnfd:vnfd-catalog:\n  vnfd: []\n')
+        with open(os.path.join(self.package, 'cloud_init', 'cloud-config.txt'), 'w') as f:
+            f.write('#cloud-config\n')
+        self.tool = package_tool.PackageTool()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def build(self):
+        with open(self.tool.build_tarfile(self.package, reproducible=True), 'rb') as f:
+            return f.read()
+
+    def test_identical_builds(self):
+        first = self.build()
+        # Only the content is packaged, not the times of the files
+        for root, _, files in os.walk(self.package):
+            for name in files:
+                os.utime(os.path.join(root, name), (1000000000, 1000000000))
+        self.assertEqual(self.build(), first)
+
+    def test_source_date_epoch(self):
+        with mock.patch.dict(os.environ, {'SOURCE_DATE_EPOCH': '1600000000'}):
+            self.build()
+        with tarfile.open(os.path.join(self.directory, 'simple_vnf.tar.gz')) as archive:
+            self.assertEqual({member.mtime for member in archive.getmembers()}, {1600000000})
+
+    def test_invalid_source_date_epoch(self):
+        first = self.build()
+        with mock.patch.dict(os.environ, {'SOURCE_DATE_EPOCH': 'yesterday'}):
+            with self.assertLogs('osmclient', 'WARNING'):
+                self.assertEqual(self.build(), first)
+
+
+if __name__ == '__main__':
+    unittest.main()
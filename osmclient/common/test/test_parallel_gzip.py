@@ -0,0 +1,56 @@
+# Copyright 2020 ETSI OSM
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import gzip
+import io
+import os
+import unittest
+from osmclient.common.parallel_gzip import ParallelGzipWriter
+
+
+class TestParallelGzip(unittest.TestCase):
+
+    def compress(self, chunks, **kwargs):
+        output = io.BytesIO()
+        with ParallelGzipWriter(output, **kwargs) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+        return output.getvalue()
+
+    def test_empty(self):
+        assert gzip.decompress(self.compress([])) == b''
+
+    def test_roundtrip_several_blocks(self):
+        data = os.urandom(50000) + b'osm' * 100000
+        compressed = self.compress([data[i:i + 7000] for i in range(0, len(data), 7000)],
+                                   block_size=16384, threads=4)
+        assert gzip.decompress(compressed) == data
+        assert len(compressed) < len(data)
+
+    def test_level_change(self):
+        output = io.BytesIO()
+        with ParallelGzipWriter(output, compresslevel=9, block_size=4096, threads=2) as writer:
+            writer.write(b'a' * 10000)
+            writer.set_level(0)
+            writer.write(b'b' * 10000)
+            writer.set_level(9)
+            writer.write(b'c' * 10000)
+        assert gzip.decompress(output.getvalue()) == b'a' * 10000 + b'b' * 10000 + b'c' * 10000
+
+    def test_deterministic(self):
+        data = b'osm repository ' * 10000
+        assert self.compress([data], mtime=0, threads=1) == self.compress([data], mtime=0, threads=3)
@@ -0,0 +1,91 @@
+# Copyright 2020 ETSI OSM
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import gzip
+import http.client
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from osmclient.common.repo_server import RepoServer
+
+
+class TestRepoServer(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.content = os.urandom(10000)
+        with open(os.path.join(self.directory, 'pkg.tar.gz'), 'wb') as f:
+            f.write(self.content)
+        with open(os.path.join(self.directory, 'index.yaml'), 'w') as f:
+            f.write('apiVersion: v1\n' * 100)
+        self.server = RepoServer(('127.0.0.1', 0), self.directory)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.directory)
+
+    def get(self, path, headers=None):
+        connection = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1])
+        connection.request('GET', path, headers=headers or {})
+        response = connection.getresponse()
+        body = response.read()
+        connection.close()
+        return response, body
+
+    def test_full_and_range(self):
+        response, body = self.get('/pkg.tar.gz')
+        assert response.status == 200 and body == self.content
+        response, body = self.get('/pkg.tar.gz', {'Range': 'bytes=100-'})
+        assert response.status == 206 and body == self.content[100:]
+        assert response.getheader('Content-Range') == 'bytes 100-9999/10000'
+        response, body = self.get('/pkg.tar.gz', {'Range': 'bytes=-10'})
+        assert response.status == 206 and body == self.content[-10:]
+        response, _ = self.get('/pkg.tar.gz', {'Range': 'bytes=10000-'})
+        assert response.status == 416
+
+    def test_validators(self):
+        response, _ = self.get('/pkg.tar.gz')
+        etag = response.getheader('ETag')
+        response, body = self.get('/pkg.tar.gz', {'If-None-Match': etag})
+        assert response.status == 304 and body == b''
+        response, _ = self.get('/pkg.tar.gz', {'If-Modified-Since': response.getheader('Last-Modified')})
+        assert response.status == 304
+
+    def test_hidden_files(self):
+        for name in ('.index_manifest.yaml', 'pkg.tar.gz.part', 'pkg.tar.gz.part.meta'):
+            with open(os.path.join(self.directory, name), 'w') as f:
+                f.write('hidden')
+            response, _ = self.get('/' + name)
+            assert response.status == 404
+        os.makedirs(os.path.join(self.directory, '.git'))
+        with open(os.path.join(self.directory, '.git', 'config'), 'w') as f:
+            f.write('hidden')
+        response, _ = self.get('/.git/config')
+        assert response.status == 404
+        response, _ = self.get('/pkg.tar.gz')
+        assert response.status == 200
+
+    def test_gzip_index(self):
+        response, body = self.get('/index.yaml', {'Accept-Encoding': 'gzip'})
+        assert response.getheader('Content-Encoding') == 'gzip'
+        assert gzip.decompress(body) == b'apiVersion: v1\n' * 100
+        response, body = self.get('/index.yaml')
+        assert response.getheader('Content-Encoding') is None and body == b'apiVersion: v1\n' * 100
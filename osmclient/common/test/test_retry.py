@@ -0,0 +1,66 @@
+# Copyright 2020 ETSI OSM
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import importlib
+import os
+import time
+import unittest
+from email.utils import formatdate
+from unittest import mock
+from osmclient.common import retry
+from osmclient.common.retry import RetryPolicy, parse_retry_after
+
+
+class TestRetry(unittest.TestCase):
+
+    def test_delay_backoff(self):
+        policy = RetryPolicy(retries=3, backoff=1, max_delay=3, budget=10)
+        for attempt in range(3):
+            delay = policy.delay(attempt)
+            self.assertTrue(0 <= delay <= min(3, 2 ** attempt))
+        self.assertIsNone(policy.delay(3))
+        self.assertEqual(policy.budget, 7)
+
+    def test_delay_budget(self):
+        policy = RetryPolicy(retries=3, backoff=1, max_delay=3, budget=1)
+        self.assertIsNotNone(policy.delay(0))
+        self.assertIsNone(policy.delay(0))
+
+    def test_delay_retry_after(self):
+        policy = RetryPolicy(retries=3, backoff=0.001, max_delay=10, budget=10)
+        self.assertEqual(policy.delay(0, retry_after=5), 5)
+        self.assertIsNone(policy.delay(0, retry_after=60))
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('120'), 120)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertAlmostEqual(parse_retry_after(formatdate(time.time() + 60, usegmt=True)), 60, delta=2)
+        self.assertEqual(parse_retry_after(formatdate(time.time() - 60, usegmt=True)), 0)
+
+    def test_invalid_environment(self):
+        with mock.patch.dict(os.environ, {'OSM_RETRIES': 'abc', 'OSM_RETRY_BACKOFF': '1s', 'OSM_RETRY_BUDGET': '-1'}):
+            self.addCleanup(importlib.reload, retry)
+            with self.assertLogs('osmclient', 'WARNING'):
+                importlib.reload(retry)
+        self.assertEqual(retry.RETRIES, 3)
+        self.assertEqual(retry.RETRY_BACKOFF, 0.5)
+        self.assertEqual(retry.RETRY_BUDGET, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+# Copyright 2020 ETSI OSM
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import unittest
+from io import StringIO
+from osmclient.common.timings import get_phases, TimingsReport
+
+TIMING = {'method': 'GET', 'url': 'https://nbi:9999/osm/nsd/v1/ns_descriptors', 'http_code': 200,
+          'namelookup': 0.01, 'connect': 0.03, 'appconnect': 0.07, 'starttransfer': 0.17, 'total': 0.2,
+          'size_download': 1000, 'size_upload': 0}
+
+
+class TestTimings(unittest.TestCase):
+
+    def test_get_phases(self):
+        phases = get_phases(TIMING)
+        expected = {'dns': 0.01, 'connect': 0.02, 'tls': 0.04, 'server': 0.1, 'transfer': 0.03}
+        for phase, seconds in expected.items():
+            self.assertAlmostEqual(phases[phase], seconds)
+
+    def test_get_phases_without_tls_or_response(self):
+        timing = dict(TIMING, appconnect=0, http_code=0)
+        phases = get_phases(timing)
+        self.assertEqual((phases['tls'], phases['server'], phases['transfer']), (0, 0, 0))
+
+    def test_report(self):
+        stream = StringIO()
+        report = TimingsReport(stream)
+        report(TIMING)
+        report(dict(TIMING, total=0.5, method='POST'))
+        report.summary()
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith('GET https://nbi:9999/osm/nsd/v1/ns_descriptors 200 | dns 10.0 ms'))
+        self.assertTrue(lines[2].startswith('2 requests |'))
+        self.assertIn('total 700.0 ms | down 2000 B', lines[2])
+        self.assertIn('slowest POST', lines[2])
+
+
+if __name__ == '__main__':
+    unittest.main()
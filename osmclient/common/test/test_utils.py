@@ -15,8 +15,13 @@
 #    under the License.
 
 
+import io
+import os
+import tarfile
+import tempfile
 import unittest
 from osmclient.common import utils
+from osmclient.common.exceptions import ClientException
 
 
 class TestUtil(unittest.TestCase):
@@ -65,3 +70,46 @@ class TestUtil(unittest.TestCase):
             lambda: foobar(),
             wait_time=1,
             catch_exception=Exception)
+
+    def test_get_key_val_from_pkg(self):
+        descriptor = b"vnfd:vnfd-catalog:\n  vnfd:\n  - id: test_vnfd\n    name: test_vnfd\n"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            package = os.path.join(tmpdir, 'test_vnf.tar.gz')
+            with tarfile.open(package, 'w:gz') as tar:
+                for name, data in (('test_vnf/test_vnfd.yaml', descriptor),
+                                   ('test_vnf/images/big.img', b'0' * 100000)):
+                    info = tarfile.TarInfo(name)
+                    info.size = len(data)
+                    tar.addfile(info, io.BytesIO(data))
+            result = utils.get_key_val_from_pkg(package)
+        assert result == {'type': 'vnfd', 'id': 'test_vnfd', 'name': 'test_vnfd'}
+
+    def test_get_key_val_from_pkg_no_descriptor(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            package = os.path.join(tmpdir, 'empty.tar.gz')
+            with tarfile.open(package, 'w:gz') as tar:
+                info = tarfile.TarInfo('empty/README.md')
+                tar.addfile(info, io.BytesIO(b''))
+            assert utils.get_key_val_from_pkg(package) is None
+
+    def test_get_descriptor_id(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            descriptor = os.path.join(tmpdir, 'test_nst.yaml')
+            with open(descriptor, 'w') as f:
+                f.write("nst:\n- id: test_nst\n  name: test_nst\n")
+            assert utils.get_descriptor_id(descriptor) == 'test_nst'
+
+    def test_get_package_md5(self):
+        assert utils.get_package_md5({'_admin': {'storage': {'pkg-md5': 'abc'}}}) == 'abc'
+        assert utils.get_package_md5({'_admin': {'storage': {}, 'md5': 'def'}}) == 'def'
+        assert utils.get_package_md5({'_admin': {}}) is None
+
+    def test_safe_join(self):
+        with tempfile.TemporaryDirectory() as base:
+            assert utils.safe_join(base, 'pkg', '1.0', 'pkg.tar.gz') == \
+                os.path.join(os.path.realpath(base), 'pkg', '1.0', 'pkg.tar.gz')
+            assert utils.safe_join(base, '/vnf/pkg/1.0/pkg.tar.gz') == \
+                os.path.join(os.path.realpath(base), 'vnf', 'pkg', '1.0', 'pkg.tar.gz')
+            for parts in (('..', 'x'), ('/vnf/../../x',), ('pkg', '..', '..'), ('.',), (None,), ('',)):
+                with self.assertRaises(ClientException):
+                    utils.safe_join(base, *parts)
@@ -0,0 +1,75 @@
+# Copyright 2020 ETSI OSM
+#
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Report of the timings of the HTTP requests, registered as timing hook of the sol005 Http client
+"""
+
+import sys
+
+# Phases of a request, computed from the cumulative times of libcurl
+PHASES = ('dns', 'connect', 'tls', 'server', 'transfer')
+
+
+def get_phases(timing):
+    """
+    Returns a dict with the seconds spent in each of PHASES by the request of timing
+    """
+    connected = timing['appconnect'] or timing['connect']
+    # The server and transfer phases are meaningless if no response was received
+    starttransfer = timing['starttransfer'] if timing['http_code'] else 0
+    return {
+        'dns': timing['namelookup'],
+        'connect': max(timing['connect'] - timing['namelookup'], 0),
+        'tls': max(timing['appconnect'] - timing['connect'], 0) if timing['appconnect'] else 0,
+        'server': max(starttransfer - connected, 0) if starttransfer else 0,
+        'transfer': max(timing['total'] - starttransfer, 0) if starttransfer else 0,
+    }
+
+
+class TimingsReport(object):
+    """
+    Prints the phases of every request, and a summary of all of them, to stream
+    """
+
+    def __init__(self, stream=None):
+        self._stream = stream or sys.stderr
+        self._timings = []
+
+    def __call__(self, timing):
+        self._timings.append(timing)
+        phases = get_phases(timing)
+        self._stream.write('{} {} {} | {} | total {:.1f} ms | down {} B | up {} B\n'.format(
+            timing['method'], timing['url'], timing['http_code'],
+            ' '.join('{} {:.1f} ms'.format(phase, phases[phase] * 1000) for phase in PHASES),
+            timing['total'] * 1000, timing['size_download'], timing['size_upload']))
+
+    def summary(self):
+        if not self._timings:
+            return
+        totals = dict.fromkeys(PHASES, 0.0)
+        for timing in self._timings:
+            for phase, seconds in get_phases(timing).items():
+                totals[phase] += seconds
+        slowest = max(self._timings, key=lambda t: t['total'])
+        self._stream.write('{} requests | {} | total {:.1f} ms | down {} B | up {} B | '
+                           'slowest {} {} {:.1f} ms\n'.format(
+            len(self._timings),
+            ' '.join('{} {:.1f} ms'.format(phase, totals[phase] * 1000) for phase in PHASES),
+            sum(t['total'] for t in self._timings) * 1000,
+            sum(t['size_download'] for t in self._timings),
+            sum(t['size_upload'] for t in self._timings),
+            slowest['method'], slowest['url'], slowest['total'] * 1000))
@@ -16,10 +16,13 @@
 
 import time
 from uuid import UUID
+from urllib.parse import quote
 import hashlib
+import os
 import tarfile
 import re
 import yaml
+from osmclient.common.exceptions import ClientException
 
 
 def wait_for_value(func, result=True, wait_time=10, catch_exception=None):
@@ -53,20 +56,43 @@ def md5(fname):
     return hash_md5.hexdigest()
 
 
+def safe_join(base, *parts):
+    """
+    Joins to base the parts of a path taken from a remote source, such as a repository index.
+    Raises ClientException if the result is base itself or is outside of it, e.g. because of ".." components
+    """
+    if not parts or not all(isinstance(part, str) and part for part in parts):
+        raise ClientException('Invalid path {} in {}'.format(parts, base))
+    base = os.path.realpath(base)
+    path = os.path.realpath(os.path.join(base, *[part.lstrip('/') for part in parts]))
+    if path == base or os.path.commonpath([base, path]) != base:
+        raise ClientException('Path {} is outside of {}'.format('/'.join(parts), base))
+    return path
+
+
+def get_descriptor_from_pkg(descriptor_file, pattern='.*.yaml'):
+    """Returns the name and the content of the first top-level file of a package
+       matching pattern (by default, a yaml file).
+       The package is read as a stream that stops at that member, so the rest of the
+       archive (e.g. images) is neither read nor decompressed.
+       Returns (None, None) if there is no such file
+    """
+    with tarfile.open(descriptor_file, 'r|*') as tar:
+        for member in tar:
+            if (member.isreg() and re.match(pattern, member.name) and
+                    len(member.name.split('/')) == 2):
+                return member.name, tar.extractfile(member).read()
+    return None, None
+
+
 def get_key_val_from_pkg(descriptor_file):
     # method opens up a package and finds the name of the resulting
     # descriptor (vnfd or nsd name)
-    tar = tarfile.open(descriptor_file)
-    yamlfile = None
-    for member in tar.getmembers():
-        if (re.match('.*.yaml', member.name) and
-                len(member.name.split('/')) == 2):
-            yamlfile = member.name
-            break
+    yamlfile, descriptor_data = get_descriptor_from_pkg(descriptor_file)
     if yamlfile is None:
         return None
 
-    dict = yaml.safe_load(tar.extractfile(yamlfile))
+    dict = yaml.safe_load(descriptor_data)
     result = {}
     for k1, v1 in list(dict.items()):
         if not k1.endswith('-catalog'):
@@ -86,5 +112,57 @@ def get_key_val_from_pkg(descriptor_file):
                     key_name = k3.split(':').pop()
 
                     result[key_name] = v3
-    tar.close()
     return result
+
+
+def get_descriptor_id(descriptor_file):
+    """Returns the id of the first descriptor of a package (tar.gz) or descriptor (yaml) file, or None.
+       Descriptors are looked for in the catalogs and lists of the file, e.g.
+       {'vnfd:vnfd-catalog': {'vnfd': [{'id': ...}]}} or {'nst': [{'id': ...}]}
+    """
+    if tarfile.is_tarfile(descriptor_file):
+        _, descriptor_data = get_descriptor_from_pkg(descriptor_file)
+    else:
+        with open(descriptor_file, 'rb') as f:
+            descriptor_data = f.read()
+    if not descriptor_data:
+        return None
+    level = [yaml.safe_load(descriptor_data)]
+    for _ in range(4):
+        next_level = []
+        for item in level:
+            if isinstance(item, dict):
+                if isinstance(item.get('id'), str):
+                    return item['id']
+                next_level.extend(item.values())
+            elif isinstance(item, list):
+                next_level.extend(item)
+        level = next_level
+    return None
+
+
+def get_package_md5(package):
+    """Returns the md5 of the package content recorded by the NBI in the _admin metadata
+       of an onboarded package, or None
+    """
+    admin = package.get('_admin') or {}
+    for metadata in (admin.get('storage') or {}, admin):
+        for key in ('pkg-md5', 'md5', 'checksum', 'content-file-md5'):
+            if metadata.get(key):
+                return metadata[key]
+    return None
+
+
+def get_unchanged_package(http, endpoint, descriptor_file, file_md5):
+    """Returns the package already onboarded at endpoint with the same descriptor id as
+       descriptor_file and content md5 file_md5, or None.
+       The package is looked up with a single request filtered by descriptor id
+    """
+    descriptor_id = get_descriptor_id(descriptor_file)
+    if not descriptor_id:
+        return None
+    _, resp = http.get_json_cmd('{}?id={}'.format(endpoint, quote(descriptor_id)))
+    for package in resp or []:
+        if get_package_md5(package) == file_md5:
+            return package
+    return None
@@ -157,7 +157,7 @@ def wait_for_status(entity_label, entity_id, timeout, apiUrlStatus, http_cmd, de
                 return
             raise
         except ClientException:
-            if retries >= max_retries or time() < time_to_finish:
+            if retries >= max_retries or time() >= time_to_finish:
                 raise
             retries += 1
             sleep(POLLING_TIME_INTERVAL)
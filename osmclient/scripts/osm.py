@@ -21,6 +21,7 @@ OSM shell/cli
 import click
 from osmclient import client
 from osmclient.common.exceptions import ClientException, NotFound
+from osmclient.common import timings
 from prettytable import PrettyTable
 import yaml
 import json
@@ -28,6 +29,7 @@ import time
 import pycurl
 import os
 import textwrap
+import atexit
 import pkg_resources
 import logging
 from datetime import datetime
@@ -113,6 +115,30 @@ def check_client_version(obj, what, version='sol005'):
               envvar='OSM_USER_DOMAIN_NAME',
               help='user domain name for keystone authentication (default to None). ' +
                    'Also can set OSM_USER_DOMAIN_NAME in environment')
+@click.option('--upload-chunk-size', 'upload_chunk_size',
+              default=None,
+              type=click.IntRange(1, None),
+              envvar='OSM_UPLOAD_CHUNK_SIZE',
+              help='upload packages bigger than this size (in MB) in chunks, resuming after network errors ' +
+                   '(default to a single request). Also can set OSM_UPLOAD_CHUNK_SIZE in environment')
+@click.option('--no-cache', 'no_cache',
+              is_flag=True,
+              default=None,
+              envvar='OSM_NO_CACHE',
+              help='do not use the disk cache of NBI responses, revalidated with ETag/Last-Modified. ' +
+                   'Also can set OSM_NO_CACHE in environment')
+@click.option('--retries', 'retries',
+              default=None,
+              type=click.IntRange(0, None),
+              envvar='OSM_RETRIES',
+              help='number of retries of a request after a transient error of the NBI, with exponential backoff ' +
+                   '(default to 3). Also can set OSM_RETRIES in environment, and OSM_RETRY_BACKOFF, ' +
+                   'OSM_RETRY_MAX_DELAY and OSM_RETRY_BUDGET')
+@click.option('--timings', 'timings',
+              is_flag=True,
+              default=False,
+              help='print the DNS, connect, TLS, server and transfer times of every request to the NBI, ' +
+                   'and a summary at exit')
 #@click.option('--so-port',
 #              default=None,
 #              envvar='OSM_SO_PORT',
@@ -144,6 +170,12 @@ def cli_osm(ctx, **kwargs):
         exit(1)
     # Remove None values
     kwargs = {k: v for k, v in kwargs.items() if v is not None}
+    if 'upload_chunk_size' in kwargs:
+        kwargs['upload_chunk_size'] *= 1024 * 1024
+    if kwargs.pop('timings', False):
+        timings_report = timings.TimingsReport()
+        atexit.register(timings_report.summary)
+        kwargs['timing_hooks'] = [timings_report]
 #    if so_port is not None:
 #        kwargs['so_port']=so_port
 #    if so_project is not None:
@@ -580,7 +612,7 @@ def nfpkg_list(ctx, nf_type, filter, long):
 
 @cli_osm.command(name='vnfpkg-repo-list', short_help='list all xNF from OSM repositories')
 @click.option('--filter', default=None,
-              help='restricts the list to the NFpkg matching the filter')
+              help='restricts the list to the NFpkg matching the filter, e.g. name=x&vendor=y or version>=1.2')
 @click.option('--repo', default=None,
               help='restricts the list to a particular OSM repository')
 @click.option('--long', is_flag=True, help='get more details')
@@ -592,7 +624,7 @@ def nfpkg_repo_list1(ctx, filter, repo, long):
 
 @cli_osm.command(name='nfpkg-repo-list', short_help='list all xNF from OSM repositories')
 @click.option('--filter', default=None,
-              help='restricts the list to the NFpkg matching the filter')
+              help='restricts the list to the NFpkg matching the filter, e.g. name=x&vendor=y or version>=1.2')
 @click.option('--repo', default=None,
               help='restricts the list to a particular OSM repository')
 @click.option('--long', is_flag=True, help='get more details')
@@ -666,7 +698,7 @@ def vnf_list1(ctx, ns, filter, long):
 
 @cli_osm.command(name='nsd-repo-list', short_help='list all NS from OSM repositories')
 @click.option('--filter', default=None,
-              help='restricts the list to the NS matching the filter')
+              help='restricts the list to the NS matching the filter, e.g. name=x&vendor=y or version>=1.2')
 @click.option('--repo', default=None,
               help='restricts the list to a particular OSM repository')
 @click.option('--long', is_flag=True, help='get more details')
@@ -678,7 +710,7 @@ def nspkg_repo_list(ctx, filter, repo, long):
 
 @cli_osm.command(name='nspkg-repo-list', short_help='list all NS from OSM repositories')
 @click.option('--filter', default=None,
-              help='restricts the list to the NS matching the filter')
+              help='restricts the list to the NS matching the filter, e.g. name=x&vendor=y or version>=1.2')
 @click.option('--repo', default=None,
               help='restricts the list to a particular OSM repository')
 @click.option('--long', is_flag=True, help='get more details')
@@ -1111,7 +1143,7 @@ def vnfd_show2(ctx, name, literal):
               help='filter by fields')
 @click.option('--version',
               default='latest',
-              help='package version')
+              help='package version or constraints, e.g. ">=1.2,<2"')
 @click.pass_context
 def vnfd_show3(ctx, name, repo, version, literal=None, filter=None):
     """shows the content of a VNFD in a repository
@@ -1133,7 +1165,7 @@ def vnfd_show3(ctx, name, repo, version, literal=None, filter=None):
               help='filter by fields')
 @click.option('--version',
               default='latest',
-              help='package version')
+              help='package version or constraints, e.g. ">=1.2,<2"')
 @click.pass_context
 def nsd_repo_show(ctx, name, repo, version, literal=None, filter=None):
     """shows the content of a VNFD in a repository
@@ -1154,7 +1186,7 @@ def nsd_repo_show(ctx, name, repo, version, literal=None, filter=None):
               help='filter by fields')
 @click.option('--version',
               default='latest',
-              help='package version')
+              help='package version or constraints, e.g. ">=1.2,<2"')
 @click.pass_context
 def nsd_repo_show2(ctx, name, repo, version, literal=None, filter=None):
     """shows the content of a VNFD in a repository
@@ -1189,7 +1221,7 @@ def nfpkg_show(ctx, name, literal):
               help='filter by fields')
 @click.option('--version',
               default='latest',
-              help='package version')
+              help='package version or constraints, e.g. ">=1.2,<2"')
 @click.pass_context
 def vnfd_show4(ctx, name, repo, version, literal=None, filter=None):
     """shows the content of a VNFD in a repository
@@ -1583,13 +1615,15 @@ def pdu_show(ctx, name, literal, filter):
 # CREATE operations
 ####################
 
-def nsd_create(ctx, filename, overwrite, skip_charm_build, repo, vendor, version):
+def nsd_create(ctx, filename, overwrite, skip_charm_build, repo, vendor, version, skip_if_unchanged=False):
     logger.debug("")
     # try:
     check_client_version(ctx.obj, ctx.command.name)
     if repo:
-        filename = ctx.obj.osmrepo.get_pkg('ns', filename, repo, vendor, version)
-    ctx.obj.nsd.create(filename, overwrite=overwrite, skip_charm_build=skip_charm_build)
+        vendor_filter = 'vendor=={}'.format(vendor) if vendor else None
+        filename = ctx.obj.osmrepo.get_pkg('ns', filename, repo, vendor_filter, version)
+    ctx.obj.nsd.create(filename, overwrite=overwrite, skip_charm_build=skip_charm_build,
+                       skip_if_unchanged=skip_if_unchanged)
     # except ClientException as e:
     #     print(str(e))
     #     exit(1)
@@ -1609,9 +1643,12 @@ def nsd_create(ctx, filename, overwrite, skip_charm_build, repo, vendor, version
 @click.option('--vendor', default=None,
               help='[repository]: filter by vendor]')
 @click.option('--version', default='latest',
-              help='[repository]: filter by version. Default: latest')
+              help='[repository]: version or constraints, e.g. ">=1.2,<2". Default: latest')
+@click.option('--skip-if-unchanged', default=False, is_flag=True,
+              help='do not upload the package if the same content is already onboarded, ignored with '
+                   '--overwrite')
 @click.pass_context
-def nsd_create1(ctx, filename, overwrite, skip_charm_build, repo, vendor, version):
+def nsd_create1(ctx, filename, overwrite, skip_charm_build, repo, vendor, version, skip_if_unchanged):
     """onboards a new NSpkg (alias of nspkg-create) (TO BE DEPRECATED)
 
     \b
@@ -1621,7 +1658,7 @@ def nsd_create1(ctx, filename, overwrite, skip_charm_build, repo, vendor, versio
     """
     logger.debug("")
     nsd_create(ctx, filename, overwrite=overwrite, skip_charm_build=skip_charm_build, repo=repo, vendor=vendor,
-               version=version)
+               version=version, skip_if_unchanged=skip_if_unchanged)
 
 
 @cli_osm.command(name='nspkg-create', short_help='creates a new NSD/NSpkg')
@@ -1638,9 +1675,12 @@ def nsd_create1(ctx, filename, overwrite, skip_charm_build, repo, vendor, versio
 @click.option('--vendor', default=None,
               help='[repository]: filter by vendor]')
 @click.option('--version', default='latest',
-              help='[repository]: filter by version. Default: latest')
+              help='[repository]: version or constraints, e.g. ">=1.2,<2". Default: latest')
+@click.option('--skip-if-unchanged', default=False, is_flag=True,
+              help='do not upload the package if the same content is already onboarded, ignored with '
+                   '--overwrite')
 @click.pass_context
-def nsd_pkg_create(ctx, filename, overwrite, skip_charm_build, repo, vendor, version):
+def nsd_pkg_create(ctx, filename, overwrite, skip_charm_build, repo, vendor, version, skip_if_unchanged):
     """onboards a new NSpkg
     \b
     FILENAME: NF Package tar.gz file, NF Descriptor YAML file or NF Package folder
@@ -1649,19 +1689,20 @@ def nsd_pkg_create(ctx, filename, overwrite, skip_charm_build, repo, vendor, ver
     """
     logger.debug("")
     nsd_create(ctx, filename, overwrite=overwrite, skip_charm_build=skip_charm_build, repo=repo, vendor=vendor,
-               version=version)
+               version=version, skip_if_unchanged=skip_if_unchanged)
 
 
 def vnfd_create(ctx, filename, overwrite, skip_charm_build, override_epa, override_nonepa, override_paravirt,
-                repo, vendor, version):
+                repo, vendor, version, skip_if_unchanged=False):
     logger.debug("")
     # try:
     check_client_version(ctx.obj, ctx.command.name)
     if repo:
-        filename = ctx.obj.osmrepo.get_pkg('vnf', filename, repo, vendor, version)
+        vendor_filter = 'vendor=={}'.format(vendor) if vendor else None
+        filename = ctx.obj.osmrepo.get_pkg('vnf', filename, repo, vendor_filter, version)
     ctx.obj.vnfd.create(filename, overwrite=overwrite, skip_charm_build=skip_charm_build,
                         override_epa=override_epa, override_nonepa=override_nonepa,
-                        override_paravirt=override_paravirt)
+                        override_paravirt=override_paravirt, skip_if_unchanged=skip_if_unchanged)
     # except ClientException as e:
     #     print(str(e))
     #     exit(1)
@@ -1687,10 +1728,13 @@ def vnfd_create(ctx, filename, overwrite, skip_charm_build, override_epa, overri
 @click.option('--vendor', default=None,
               help='[repository]: filter by vendor]')
 @click.option('--version', default='latest',
-              help='[repository]: filter by version. Default: latest')
+              help='[repository]: version or constraints, e.g. ">=1.2,<2". Default: latest')
+@click.option('--skip-if-unchanged', default=False, is_flag=True,
+              help='do not upload the package if the same content is already onboarded, ignored with '
+                   '--overwrite and the --override options')
 @click.pass_context
 def vnfd_create1(ctx, filename, overwrite, skip_charm_build, override_epa, override_nonepa, override_paravirt,
-                 repo,vendor, version):
+                 repo,vendor, version, skip_if_unchanged):
     """creates a new VNFD/VNFpkg
     \b
     FILENAME: NF Package tar.gz file, NF Descriptor YAML file or NF Package folder
@@ -1700,7 +1744,8 @@ def vnfd_create1(ctx, filename, overwrite, skip_charm_build, override_epa, overr
     logger.debug("")
     vnfd_create(ctx, filename, overwrite=overwrite, skip_charm_build=skip_charm_build,
                 override_epa=override_epa, override_nonepa=override_nonepa, override_paravirt=override_paravirt,
-                repo=repo, vendor=vendor, version=version)
+                repo=repo, vendor=vendor, version=version,
+                skip_if_unchanged=skip_if_unchanged)
 
 
 @cli_osm.command(name='vnfpkg-create', short_help='creates a new VNFD/VNFpkg')
@@ -1723,10 +1768,13 @@ def vnfd_create1(ctx, filename, overwrite, skip_charm_build, override_epa, overr
 @click.option('--vendor', default=None,
               help='[repository]: filter by vendor]')
 @click.option('--version', default='latest',
-              help='[repository]: filter by version. Default: latest')
+              help='[repository]: version or constraints, e.g. ">=1.2,<2". Default: latest')
+@click.option('--skip-if-unchanged', default=False, is_flag=True,
+              help='do not upload the package if the same content is already onboarded, ignored with '
+                   '--overwrite and the --override options')
 @click.pass_context
 def vnfd_create2(ctx, filename, overwrite, skip_charm_build, override_epa, override_nonepa, override_paravirt,
-                 repo, vendor, version):
+                 repo, vendor, version, skip_if_unchanged):
     """creates a new VNFD/VNFpkg
     \b
     FILENAME: NF Package tar.gz file, NF Descriptor YAML file or NF Package folder
@@ -1736,7 +1784,8 @@ def vnfd_create2(ctx, filename, overwrite, skip_charm_build, override_epa, overr
     logger.debug("")
     vnfd_create(ctx, filename, overwrite=overwrite, skip_charm_build=skip_charm_build,
                 override_epa=override_epa, override_nonepa=override_nonepa, override_paravirt=override_paravirt,
-                repo=repo, vendor=vendor, version=version)
+                repo=repo, vendor=vendor, version=version,
+                skip_if_unchanged=skip_if_unchanged)
 
 @cli_osm.command(name='nfpkg-create', short_help='creates a new NFpkg')
 @click.argument('filename')
@@ -1758,10 +1807,13 @@ def vnfd_create2(ctx, filename, overwrite, skip_charm_build, override_epa, overr
 @click.option('--vendor', default=None,
               help='[repository]: filter by vendor]')
 @click.option('--version', default='latest',
-              help='[repository]: filter by version. Default: latest')
+              help='[repository]: version or constraints, e.g. ">=1.2,<2". Default: latest')
+@click.option('--skip-if-unchanged', default=False, is_flag=True,
+              help='do not upload the package if the same content is already onboarded, ignored with '
+                   '--overwrite and the --override options')
 @click.pass_context
 def nfpkg_create(ctx, filename, overwrite, skip_charm_build, override_epa, override_nonepa, override_paravirt,
-                 repo, vendor, version):
+                 repo, vendor, version, skip_if_unchanged):
     """creates a new NFpkg
 
     \b
@@ -1772,7 +1824,8 @@ def nfpkg_create(ctx, filename, overwrite, skip_charm_build, override_epa, overr
     logger.debug("")
     vnfd_create(ctx, filename, overwrite=overwrite, skip_charm_build=skip_charm_build,
                 override_epa=override_epa, override_nonepa=override_nonepa, override_paravirt=override_paravirt,
-                repo=repo, vendor=vendor, version=version)
+                repo=repo, vendor=vendor, version=version,
+                skip_if_unchanged=skip_if_unchanged)
 
 
 @cli_osm.command(name='ns-create', short_help='creates a new Network Service instance')
@@ -1831,11 +1884,11 @@ def ns_create(ctx,
     #     exit(1)
 
 
-def nst_create(ctx, filename, overwrite):
+def nst_create(ctx, filename, overwrite, skip_if_unchanged=False):
     logger.debug("")
     # try:
     check_client_version(ctx.obj, ctx.command.name)
-    ctx.obj.nst.create(filename, overwrite)
+    ctx.obj.nst.create(filename, overwrite, skip_if_unchanged=skip_if_unchanged)
     # except ClientException as e:
     #     print(str(e))
     #     exit(1)
@@ -1848,14 +1901,17 @@ def nst_create(ctx, filename, overwrite):
 @click.option('--override', 'overwrite', default=None,
               help='overrides fields in descriptor, format: '
                    '"key1.key2...=value[;key3...=value;...]"')
+@click.option('--skip-if-unchanged', default=False, is_flag=True,
+              help='do not upload the package if the same content is already onboarded, ignored with '
+                   '--overwrite')
 @click.pass_context
-def nst_create1(ctx, filename, overwrite):
+def nst_create1(ctx, filename, overwrite, skip_if_unchanged):
     """creates a new Network Slice Template (NST)
 
     FILENAME: NST package folder, NST yaml file or NSTpkg tar.gz file
     """
     logger.debug("")
-    nst_create(ctx, filename, overwrite)
+    nst_create(ctx, filename, overwrite, skip_if_unchanged)
 
 
 @cli_osm.command(name='netslice-template-create', short_help='creates a new Network Slice Template (NST)')
@@ -1865,14 +1921,17 @@ def nst_create1(ctx, filename, overwrite):
 @click.option('--override', 'overwrite', default=None,
               help='overrides fields in descriptor, format: '
                    '"key1.key2...=value[;key3...=value;...]"')
+@click.option('--skip-if-unchanged', default=False, is_flag=True,
+              help='do not upload the package if the same content is already onboarded, ignored with '
+                   '--overwrite')
 @click.pass_context
-def nst_create2(ctx, filename, overwrite):
+def nst_create2(ctx, filename, overwrite, skip_if_unchanged):
     """creates a new Network Slice Template (NST)
 
     FILENAME: NST yaml file or NSTpkg tar.gz file
     """
     logger.debug("")
-    nst_create(ctx, filename, overwrite)
+    nst_create(ctx, filename, overwrite, skip_if_unchanged)
 
 
 def nsi_create(ctx, nst_name, nsi_name, vim_account, ssh_keys, config, config_file, wait):
@@ -3215,14 +3274,46 @@ def repo_update(ctx,
 @cli_osm.command(name='repo-index', short_help='Index a repository from a folder with artifacts')
 @click.option('--origin', default='.', help='origin path where the artifacts are located')
 @click.option('--destination', default='.', help='destination path where the index is deployed')
+@click.option('--jobs', default=1, type=click.IntRange(1, None),
+              help='number of processes validating and building the artifacts in parallel. Default: 1')
 @click.pass_context
-def repo_index(ctx, origin, destination):
+def repo_index(ctx, origin, destination, jobs):
     """Index a repository
 
     NAME: name or ID of the repo to be deleted
     """
     check_client_version(ctx.obj, ctx.command.name)
-    ctx.obj.osmrepo.repo_index(origin, destination)
+    ctx.obj.osmrepo.repo_index(origin, destination, jobs=jobs)
+
+
+@cli_osm.command(name='repo-sync', short_help='Mirror an OSM repository into a local folder')
+@click.argument('repo')
+@click.argument('destination')
+@click.option('--jobs', default=8, type=click.IntRange(1, None),
+              help='number of packages downloaded in parallel. Default: 8')
+@click.pass_context
+def repo_sync(ctx, repo, destination, jobs):
+    """Mirror an OSM repository into a local folder, downloading only new or changed packages
+
+    REPO: name or ID of the repo to be mirrored
+    DESTINATION: local folder of the mirror, which can be served as an OSM repository
+    """
+    check_client_version(ctx.obj, ctx.command.name)
+    ctx.obj.osmrepo.repo_sync(repo, destination, jobs=jobs)
+
+
+@cli_osm.command(name='repo-serve', short_help='Serve a local repository over HTTP')
+@click.argument('directory')
+@click.option('--host', default='0.0.0.0', help='address to listen on. Default: 0.0.0.0')
+@click.option('--port', default=8000, type=click.IntRange(0, 65535), help='port to listen on. Default: 8000')
+@click.pass_context
+def repo_serve(ctx, directory, host, port):
+    """Serve a repository created by repo-index or repo-sync over HTTP
+
+    DIRECTORY: folder of the repository
+    """
+    from osmclient.common import repo_server
+    repo_server.serve(directory, host=host, port=port)
 
 
 @cli_osm.command(name='repo-delete', short_help='deletes a repo')
@@ -3749,15 +3840,17 @@ def get_version(ctx):
 @click.argument('filename')
 @click.option('--skip-charm-build', default=False, is_flag=True,
               help='the charm will not be compiled, it is assumed to already exist')
+@click.option('--skip-if-unchanged', default=False, is_flag=True,
+              help='do not upload the package if the same content is already onboarded')
 @click.pass_context
-def upload_package(ctx, filename, skip_charm_build):
+def upload_package(ctx, filename, skip_charm_build, skip_if_unchanged):
     """uploads a vnf package or ns package
 
     filename: vnf or ns package folder, or vnf or ns package file (tar.gz)
     """
     logger.debug("")
     # try:
-    ctx.obj.package.upload(filename, skip_charm_build=skip_charm_build)
+    ctx.obj.package.upload(filename, skip_charm_build=skip_charm_build, skip_if_unchanged=skip_if_unchanged)
     fullclassname = ctx.obj.__module__ + "." + ctx.obj.__class__.__name__
     if fullclassname != 'osmclient.sol005.client.Client':
         ctx.obj.package.wait_for_upload(filename)
@@ -4273,11 +4366,22 @@ def package_validate(ctx,
               help='skip package validation')
 @click.option('--skip-charm-build', default=False, is_flag=True,
               help='the charm will not be compiled, it is assumed to already exist')
+@click.option('--reproducible', default=False, is_flag=True,
+              help='build a byte-identical tar.gz for identical package contents '
+                   '(normalized ownership, permissions, mtime and member order)')
+@click.option('--compression-level', default=None, type=click.IntRange(0, 9),
+              help='gzip compression level, from 0 (store only) to 9. '
+                   'Default: 9, except for already compressed files, which are stored')
+@click.option('--compression-threads', default=None, type=click.IntRange(1, None),
+              help='number of threads used to compress the package. Default: number of CPUs')
 @click.pass_context
 def package_build(ctx,
                   package_folder,
                   skip_validation,
-                  skip_charm_build):
+                  skip_charm_build,
+                  reproducible,
+                  compression_level,
+                  compression_threads):
     """
     Build the package NS, VNF given the package_folder.
 
@@ -4288,7 +4392,10 @@ def package_build(ctx,
     check_client_version(ctx.obj, ctx.command.name)
     results = ctx.obj.package_tool.build(package_folder,
                                          skip_validation=skip_validation,
-                                         skip_charm_build=skip_charm_build)
+                                         skip_charm_build=skip_charm_build,
+                                         reproducible=reproducible,
+                                         compresslevel=compression_level,
+                                         compression_threads=compression_threads)
     print(results)
     # except ClientException as inst:
     #     print("ERROR: {}".format(inst))
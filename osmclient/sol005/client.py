@@ -126,6 +126,9 @@ class Client(object):
                 http_header = ['{}: {}'.format(key, val)
                                for (key, val) in list(self._headers.items())]
                 self._http_client.set_http_header(http_header)
+                # Cached responses are only shared by the same user and project
+                self._http_client.set_cache_scope('{}@{}/{}@{}'.format(
+                    self._user, self._user_domain_name or '', self._project, self._project_domain_name or ''))
 
     def get_version(self):
         _, resp = self._http_client.get2_cmd(endpoint="/version", skip_query_admin=True)
@@ -15,17 +15,144 @@
 #    under the License.
 
 import copy
+from functools import partial
 from io import BytesIO
-import json
 import logging
+import os
+import sys
+import time
 
 from osmclient.common import http
-from osmclient.common.exceptions import OsmHttpException, NotFound
+from osmclient.common.http_cache import HttpCache
+from osmclient.common import retry
+from osmclient.common import jsoncodec
+from osmclient.common.exceptions import ClientException, OsmHttpException, NotFound
 import pycurl
+import verboselogs
+
+
+def header_collector(response_headers):
+    """
+    Returns a pycurl HEADERFUNCTION that stores the response headers in the dict response_headers,
+    with lowercase names
+    """
+    def header_function(header_line):
+        if b':' in header_line:
+            key, value = header_line.decode('iso-8859-1').split(':', 1)
+            response_headers[key.strip().lower()] = value.strip()
+    return header_function
+
+
+class FileRange(object):
+    """
+    Reads count bytes of a file starting at offset, used as pycurl READFUNCTION to stream request bodies
+    """
+
+    def __init__(self, stream, offset, count):
+        self._stream = stream
+        self._stream.seek(offset)
+        self._remaining = count
+
+    def read(self, size):
+        data = self._stream.read(min(size, self._remaining))
+        self._remaining -= len(data)
+        return data
+
+
+class DownloadWriter(object):
+    """
+    pycurl HEADERFUNCTION and WRITEFUNCTION that write the body of successful responses to stream, and keep
+    the body of error responses in memory.
+    If expected_code is set, the transfer of any other response is aborted at its first byte, and aborted
+    is set. Otherwise, a 200 response to a resumed download means that the server ignored the Range, and
+    stream is truncated.
+    on_body is called with the http code and the response headers before the first byte of a
+    successful body is written
+    """
+
+    def __init__(self, stream, expected_code=None, on_body=None):
+        self._stream = stream
+        self._expected_code = expected_code
+        self._on_body = on_body
+        self._http_code = None
+        self._write = None
+        self.headers = {}
+        self.error = BytesIO()
+        self.aborted = False
+
+    def header(self, header_line):
+        # getinfo cannot be called during the transfer, the code is taken from the status line
+        if header_line.startswith(b'HTTP/'):
+            self._http_code = int(header_line.split()[1])
+            self._write = None
+            self.headers = {}
+        else:
+            header_collector(self.headers)(header_line)
+
+    def write(self, data):
+        if self._write is None:
+            http_code = self._http_code or 0
+            if self._expected_code and http_code != self._expected_code:
+                # The body, possibly the whole file, is not read
+                self.aborted = True
+                return 0
+            if http_code >= 300:
+                self._write = self.error.write
+            else:
+                if http_code == 200 and self._stream.tell():
+                    self._stream.seek(0)
+                    self._stream.truncate()
+                if self._on_body:
+                    self._on_body(http_code, self.headers)
+                self._write = self._stream.write
+        self._write(data)
+
+
+class DownloadProgress(object):
+    """
+    Prints the progress of a download, possibly split in several transfers, to stderr
+    """
+    INTERVAL = 0.5
+
+    def __init__(self, name, offset=0):
+        self._name = name
+        self._offset = offset
+        self._transfers = {}
+        self._last = 0
+
+    def callback(self, transfer=0):
+        """
+        Returns a pycurl XFERINFOFUNCTION for transfer
+        """
+        def xferinfo(download_total, downloaded, upload_total, uploaded):
+            self._transfers[transfer] = (download_total, downloaded)
+            if download_total and time.time() - self._last >= self.INTERVAL:
+                self.show()
+        return xferinfo
+
+    def show(self, end=''):
+        self._last = time.time()
+        total = self._offset + sum(t for t, _ in self._transfers.values())
+        done = self._offset + sum(d for _, d in self._transfers.values())
+        percent = ' {:3.0f}%'.format(100.0 * done / total) if total else ''
+        sys.stderr.write('\r{}: {:.1f}/{:.1f} MB{}{}'.format(self._name, done / 1048576, total / 1048576,
+                                                            percent, end))
+        sys.stderr.flush()
 
 
 class Http(http.Http):
     CONNECT_TIMEOUT = 15
+    # Smallest size of the segments of a parallel download
+    MIN_SEGMENT_SIZE = 8 * 1024 * 1024
+    # Methods that can be sent again after any transient error
+    IDEMPOTENT_METHODS = ('GET', 'HEAD', 'PUT', 'DELETE')
+    # Transient errors of the NBI or of the load balancer in front of it
+    RETRY_HTTP_CODES = (429, 502, 503, 504)
+    # Errors raised before the request is sent, any method can be retried
+    CONNECT_ERRORS = (pycurl.E_COULDNT_RESOLVE_HOST, pycurl.E_COULDNT_CONNECT, pycurl.E_OPERATION_TIMEDOUT,
+                      pycurl.E_SSL_CONNECT_ERROR)
+    # Errors raised once the request may have been received by the server
+    TRANSFER_ERRORS = (pycurl.E_GOT_NOTHING, pycurl.E_SEND_ERROR, pycurl.E_RECV_ERROR, pycurl.E_PARTIAL_FILE)
 
     def __init__(self, url, user='admin', password='admin', **kwargs):
         self._url = url
@@ -40,6 +167,15 @@ class Http(http.Http):
             self._all_projects = kwargs['all_projects']
         if 'public' in kwargs:
             self._public = kwargs['public']
+        # Files bigger than this (in bytes) are uploaded in several requests with Content-Range
+        self._upload_chunk_size = kwargs.get('upload_chunk_size')
+        # Number of parallel Range requests used to download big files
+        self._download_segments = kwargs.get('download_segments', 1)
+        # Responses of GET requests with validators are cached, and revalidated with conditional requests
+        self._cache = None if kwargs.get('no_cache') else HttpCache()
+        self._cache_scope = ''
+        self._retry_policy = retry.RetryPolicy(retries=kwargs.get('retries', retry.RETRIES))
+        self._timing_hooks = list(kwargs.get('timing_hooks', []))
         self._default_query_admin = self._complete_default_query_admin()
 
     def _complete_default_query_admin(self):
@@ -73,6 +209,82 @@ class Http(http.Http):
             curl_cmd.setopt(pycurl.HTTPHEADER, self._http_header)
         return curl_cmd
 
+    def add_timing_hook(self, hook):
+        """
+        Registers hook, called after every request with a dict with its method, url and http_code (0 if it
+        failed), the times of libcurl in seconds since the start of the request (namelookup, connect,
+        appconnect, starttransfer, total) and the size_download and size_upload in bytes
+        """
+        self._timing_hooks.append(hook)
+
+    def _report_timings(self, curl_cmd, method, http_code):
+        if not self._timing_hooks:
+            return
+        timing = {
+            'method': method,
+            'url': curl_cmd.getinfo(pycurl.EFFECTIVE_URL),
+            'http_code': http_code,
+            'namelookup': curl_cmd.getinfo(pycurl.NAMELOOKUP_TIME),
+            'connect': curl_cmd.getinfo(pycurl.CONNECT_TIME),
+            'appconnect': curl_cmd.getinfo(pycurl.APPCONNECT_TIME),
+            'starttransfer': curl_cmd.getinfo(pycurl.STARTTRANSFER_TIME),
+            'total': curl_cmd.getinfo(pycurl.TOTAL_TIME),
+            'size_download': int(curl_cmd.getinfo(pycurl.SIZE_DOWNLOAD)),
+            'size_upload': int(curl_cmd.getinfo(pycurl.SIZE_UPLOAD)),
+        }
+        for hook in self._timing_hooks:
+            hook(timing)
+
+    def _perform(self, curl_cmd, method, data, response_headers=None, rewind=None, idempotent=None):
+        """
+        Performs curl_cmd and returns the HTTP code. Connection errors are retried for any method, and
+        transfer errors and RETRY_HTTP_CODES for the idempotent ones, with the delays of the retry policy
+        and honouring Retry-After. curl_cmd is not closed
+        params:
+            method: HTTP method, to know if it is idempotent
+            data: BytesIO of the WRITEFUNCTION, emptied before a retry
+            response_headers: dict of the HEADERFUNCTION, if the caller sets one
+            rewind: function called before a retry to restart the request body
+            idempotent: overrides the check of the method
+        """
+        if idempotent is None:
+            idempotent = method in self.IDEMPOTENT_METHODS
+        if response_headers is None:
+            response_headers = {}
+            curl_cmd.setopt(pycurl.HEADERFUNCTION, header_collector(response_headers))
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                curl_cmd.perform()
+            except pycurl.error as e:
+                self._report_timings(curl_cmd, method, 0)
+                if e.args[0] not in self.CONNECT_ERRORS and not (idempotent and e.args[0] in self.TRANSFER_ERRORS):
+                    raise
+                delay = self._retry_policy.delay(attempt)
+                if delay is None:
+                    raise
+                reason = e.args[1] if len(e.args) > 1 else e
+            else:
+                http_code = curl_cmd.getinfo(pycurl.HTTP_CODE)
+                self._report_timings(curl_cmd, method, http_code)
+                if not idempotent or http_code not in self.RETRY_HTTP_CODES:
+                    return http_code
+                retry_after = retry.parse_retry_after(response_headers.get('retry-after'))
+                delay = self._retry_policy.delay(attempt, retry_after)
+                if delay is None:
+                    return http_code
+                reason = "HTTP code {}".format(http_code)
+            attempt += 1
+            self._logger.warning("{} {} failed ({}), retry {} in {:.1f} seconds".format(
+                method, curl_cmd.getinfo(pycurl.EFFECTIVE_URL), reason, attempt, delay))
+            time.sleep(delay)
+            data.seek(0)
+            data.truncate()
+            response_headers.clear()
+            if rewind:
+                rewind()
+
     def delete_cmd(self, endpoint, skip_query_admin=False):
         self._logger.debug("")
         data = BytesIO()
@@ -80,18 +292,14 @@ class Http(http.Http):
         curl_cmd.setopt(pycurl.CUSTOMREQUEST, "DELETE")
         curl_cmd.setopt(pycurl.WRITEFUNCTION, data.write)
         self._logger.info("Request METHOD: {} URL: {}".format("DELETE", self._url + endpoint))
-        curl_cmd.perform()
-        http_code = curl_cmd.getinfo(pycurl.HTTP_CODE)
+        try:
+            http_code = self._perform(curl_cmd, "DELETE", data)
+        finally:
+            curl_cmd.close()
         self._logger.info("Response HTTPCODE: {}".format(http_code))
-        curl_cmd.close()
         self.check_http_response(http_code, data)
         # TODO 202 accepted should be returned somehow
-        if data.getvalue():
-            data_text = data.getvalue().decode()
-            self._logger.verbose("Response DATA: {}".format(data_text))
-            return http_code, data_text
-        else:
-            return http_code, None
+        return http_code, self._response_text(data)
 
     def send_cmd(self, endpoint='', postfields_dict=None,
                  formfile=None, filename=None,
@@ -99,6 +307,9 @@ class Http(http.Http):
                  skip_query_admin=False):
         self._logger.debug("")
         data = BytesIO()
+        stream = None
+        rewind = None
+        method = "PUT" if put_method else "PATCH" if patch_method else "POST"
         curl_cmd = self._get_curl_cmd(endpoint, skip_query_admin)
         if put_method:
             curl_cmd.setopt(pycurl.CUSTOMREQUEST, "PUT")
@@ -108,14 +319,15 @@ class Http(http.Http):
         curl_cmd.setopt(pycurl.WRITEFUNCTION, data.write)
 
         if postfields_dict is not None:
-            jsondata = json.dumps(postfields_dict)
-            if 'password' in postfields_dict:
-                postfields_dict_copy = copy.deepcopy(postfields_dict)
-                postfields_dict_copy['password'] = '******'
-                jsondata_log = json.dumps(postfields_dict_copy)
-            else:
-                jsondata_log = jsondata
-            self._logger.verbose("Request POSTFIELDS: {}".format(jsondata_log))
+            jsondata = jsoncodec.dumps(postfields_dict)
+            if self._logger.isEnabledFor(verboselogs.VERBOSE):
+                if 'password' in postfields_dict:
+                    postfields_dict_copy = copy.deepcopy(postfields_dict)
+                    postfields_dict_copy['password'] = '******'
+                    jsondata_log = jsoncodec.dumps(postfields_dict_copy)
+                else:
+                    jsondata_log = jsondata
+                self._logger.verbose("Request POSTFIELDS: {}".format(jsondata_log))
             curl_cmd.setopt(pycurl.POSTFIELDS, jsondata)
         elif formfile is not None:
             curl_cmd.setopt(
@@ -124,28 +336,86 @@ class Http(http.Http):
                            (pycurl.FORM_FILE,
                             formfile[1])))])
         elif filename is not None:
-            with open(filename, 'rb') as stream:
-                postdata = stream.read()
+            if self._upload_chunk_size and os.path.getsize(filename) > self._upload_chunk_size:
+                curl_cmd.close()
+                return self.send_file_chunks(endpoint, filename, put_method=put_method, patch_method=patch_method,
+                                             skip_query_admin=skip_query_admin)
+            # The file is streamed from disk while it is sent, instead of being read in memory
+            stream = open(filename, 'rb')
             self._logger.verbose("Request POSTFIELDS: Binary content")
-            curl_cmd.setopt(pycurl.POSTFIELDS, postdata)
+            curl_cmd.setopt(pycurl.READFUNCTION, stream.read)
+            curl_cmd.setopt(pycurl.POSTFIELDSIZE_LARGE, os.fstat(stream.fileno()).st_size)
+            rewind = partial(stream.seek, 0)
+            # An empty Expect header avoids waiting for a "100 Continue" before sending the body
+            curl_cmd.setopt(pycurl.HTTPHEADER, (self._http_header or []) + ['Expect:'])
 
-        if put_method:
-            self._logger.info("Request METHOD: {} URL: {}".format("PUT", self._url + endpoint))
-        elif patch_method:
-            self._logger.info("Request METHOD: {} URL: {}".format("PATCH", self._url + endpoint))
-        else:
-            self._logger.info("Request METHOD: {} URL: {}".format("POST", self._url + endpoint))
-        curl_cmd.perform()
-        http_code = curl_cmd.getinfo(pycurl.HTTP_CODE)
+        self._logger.info("Request METHOD: {} URL: {}".format(method, self._url + endpoint))
+        try:
+            http_code = self._perform(curl_cmd, method, data, rewind=rewind)
+        finally:
+            curl_cmd.close()
+            if stream:
+                stream.close()
         self._logger.info("Response HTTPCODE: {}".format(http_code))
-        curl_cmd.close()
         self.check_http_response(http_code, data)
-        if data.getvalue():
-            data_text = data.getvalue().decode()
-            self._logger.verbose("Response DATA: {}".format(data_text))
-            return http_code, data_text
-        else:
-            return http_code, None
+        return http_code, self._response_text(data)
+
+    def send_file_chunks(self, endpoint, filename, put_method=False, patch_method=False, skip_query_admin=False):
+        """
+        Uploads filename in chunks of upload_chunk_size bytes, each one in a request with a Content-Range header.
+        The server returns a Transaction-Id header until the upload is complete, that is sent with the next
+        chunks. A chunk that fails because of a transient network or server error is sent again from its
+        first byte.
+        Returns the http code and the response of the last request
+        """
+        self._logger.debug("")
+        file_size = os.path.getsize(filename)
+        transaction_id = None
+        offset = 0
+        with open(filename, 'rb') as stream:
+            while offset < file_size:
+                count = min(self._upload_chunk_size, file_size - offset)
+                headers = ['Content-Range: bytes {}-{}/{}'.format(offset, offset + count - 1, file_size)]
+                if transaction_id:
+                    headers.append('Transaction-Id: {}'.format(transaction_id))
+                http_code, data, response_headers = self._send_file_range(
+                    endpoint, stream, offset, count, headers, put_method, patch_method, skip_query_admin)
+                self.check_http_response(http_code, data)
+                transaction_id = response_headers.get('transaction-id', transaction_id)
+                offset += count
+                if offset < file_size and not transaction_id:
+                    raise ClientException("Chunked upload of {} not supported by the server, no Transaction-Id "
+                                          "received".format(filename))
+        return http_code, self._response_text(data)
+
+    def _send_file_range(self, endpoint, stream, offset, count, headers, put_method, patch_method,
+                         skip_query_admin):
+        data = BytesIO()
+        response_headers = {}
+
+        method = "PUT" if put_method else "PATCH" if patch_method else "POST"
+        curl_cmd = self._get_curl_cmd(endpoint, skip_query_admin)
+        # An empty Expect header avoids waiting for a "100 Continue" before sending the body
+        curl_cmd.setopt(pycurl.HTTPHEADER, (self._http_header or []) + headers + ['Expect:'])
+        if method != "POST":
+            curl_cmd.setopt(pycurl.CUSTOMREQUEST, method)
+        curl_cmd.setopt(pycurl.POST, 1)
+        curl_cmd.setopt(pycurl.READFUNCTION, FileRange(stream, offset, count).read)
+        curl_cmd.setopt(pycurl.POSTFIELDSIZE_LARGE, count)
+        curl_cmd.setopt(pycurl.WRITEFUNCTION, data.write)
+        curl_cmd.setopt(pycurl.HEADERFUNCTION, header_collector(response_headers))
+
+        def rewind():
+            curl_cmd.setopt(pycurl.READFUNCTION, FileRange(stream, offset, count).read)
+
+        self._logger.info("Request METHOD: {} URL: {} {}".format(method, self._url + endpoint, headers[0]))
+        try:
+            # Sending the same range again is safe, whatever the method
+            http_code = self._perform(curl_cmd, method, data, response_headers, rewind, idempotent=True)
+        finally:
+            curl_cmd.close()
+        self._logger.info("Response HTTPCODE: {}".format(http_code))
+        return http_code, data, response_headers
 
     def post_cmd(self, endpoint='', postfields_dict=None,
                  formfile=None, filename=None,
@@ -177,29 +447,285 @@ class Http(http.Http):
                              put_method=False, patch_method=True,
                              skip_query_admin=skip_query_admin)
 
+    def set_cache_scope(self, scope):
+        """
+        Sets the authentication scope (e.g. user and project) that is part of the key of the cached responses
+        """
+        self._cache_scope = scope
+
     def get2_cmd(self, endpoint, skip_query_admin=False):
+        http_code, body = self._get_body(endpoint, skip_query_admin)
+        return http_code, body.decode() if body else None
+
+    def get_json_cmd(self, endpoint, skip_query_admin=False):
+        """
+        As get2_cmd, but returns the response parsed with the JSON codec directly from the received bytes
+        """
+        http_code, body = self._get_body(endpoint, skip_query_admin)
+        return http_code, jsoncodec.loads(body) if body else None
+
+    def _get_body(self, endpoint, skip_query_admin):
+        """
+        Returns the http code and the body, as bytes, of a GET request
+        """
         self._logger.debug("")
         data = BytesIO()
+        response_headers = {}
         curl_cmd = self._get_curl_cmd(endpoint, skip_query_admin)
         curl_cmd.setopt(pycurl.HTTPGET, 1)
+        # An empty value requests all the encodings supported by libcurl (gzip, deflate, br...),
+        # the response is decompressed transparently
+        curl_cmd.setopt(pycurl.ACCEPT_ENCODING, "")
         curl_cmd.setopt(pycurl.WRITEFUNCTION, data.write)
+        curl_cmd.setopt(pycurl.HEADERFUNCTION, header_collector(response_headers))
+        cache_key = validators = None
+        if self._cache:
+            url = self._url + (endpoint if skip_query_admin else self._complete_endpoint(endpoint))
+            accept = [h for h in self._http_header or [] if h.lower().startswith('accept:')]
+            cache_key = '{} {} {}'.format(self._cache_scope, accept, url)
+            validators, cached_body = self._cache.get(cache_key)
+            if validators:
+                conditions = []
+                if validators.get('etag'):
+                    conditions.append('If-None-Match: {}'.format(validators['etag']))
+                if validators.get('last_modified'):
+                    conditions.append('If-Modified-Since: {}'.format(validators['last_modified']))
+                curl_cmd.setopt(pycurl.HTTPHEADER, (self._http_header or []) + conditions)
         self._logger.info("Request METHOD: {} URL: {}".format("GET", self._url + endpoint))
-        curl_cmd.perform()
-        http_code = curl_cmd.getinfo(pycurl.HTTP_CODE)
+        try:
+            http_code = self._perform(curl_cmd, "GET", data, response_headers)
+            if self._logger.isEnabledFor(verboselogs.VERBOSE):
+                self._logger.verbose("Response SIZE: {} bytes received, {} bytes decoded".format(
+                    int(curl_cmd.getinfo(pycurl.SIZE_DOWNLOAD)), data.tell()))
+        finally:
+            curl_cmd.close()
         self._logger.info("Response HTTPCODE: {}".format(http_code))
-        curl_cmd.close()
-        self.check_http_response(http_code, data)
-        if data.getvalue():
-            data_text = data.getvalue().decode()
+        if http_code == 304 and validators:
+            self._logger.verbose("Response served from cache")
+            http_code = 200
+            body = cached_body
+        else:
+            self.check_http_response(http_code, data)
+            # The only copy of the response, the bytes are decoded or parsed by the caller
+            body = data.getvalue()
+            if cache_key and 'no-store' not in response_headers.get('cache-control', ''):
+                new_validators = {'etag': response_headers.get('etag'),
+                                  'last_modified': response_headers.get('last-modified')}
+                if new_validators['etag'] or new_validators['last_modified']:
+                    self._cache.put(cache_key, new_validators, body)
+        if body and self._logger.isEnabledFor(verboselogs.VERBOSE):
+            self._logger.verbose("Response DATA: {}".format(body.decode()))
+        return http_code, body or None
+
+    def download_cmd(self, endpoint, filename, resume=True, segments=None, progress=False, accept='*/*',
+                     skip_query_admin=False):
+        """
+        Downloads endpoint to filename, writing the response body to disk as it arrives.
+        The file is written to filename.part, and renamed when complete. The validator and the size of
+        the response are kept in filename.part.meta while the download is incomplete
+        params:
+            resume: if filename.part exists, only the remaining bytes are requested, with If-Range so that
+                    the whole file is sent again if it changed. Without a validator, the download restarts
+            segments: number of parallel Range requests for big files. Default: download_segments of the client
+            progress: print the progress of the download to stderr
+            accept: value of the Accept header
+        returns: http code
+        """
+        self._logger.debug("")
+        temp_file = '{}.part'.format(filename)
+        offset = 0
+        if resume and os.path.isfile(temp_file) and self._read_part_meta(temp_file).get('validator'):
+            offset = os.path.getsize(temp_file)
+        segments = segments or self._download_segments
+        headers = [h for h in self._http_header or [] if not h.lower().startswith('accept:')]
+        headers.append('Accept: {}'.format(accept))
+        size = None
+        if segments > 1 and not offset:
+            size = self._get_ranges_size(endpoint, headers, skip_query_admin)
+        if size and size >= 2 * self.MIN_SEGMENT_SIZE:
+            http_code = self._download_segments_cmd(endpoint, temp_file, headers, size, segments, progress,
+                                                    skip_query_admin)
+        else:
+            http_code = self._download_single_cmd(endpoint, temp_file, headers, offset, progress, skip_query_admin)
+        os.replace(temp_file, filename)
+        self._remove_part(temp_file, keep_part=True)
+        return http_code
+
+    @staticmethod
+    def _read_part_meta(temp_file):
+        try:
+            with open('{}.meta'.format(temp_file)) as f:
+                return jsoncodec.loads(f.read())
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _write_part_meta(temp_file, http_code, response_headers):
+        # The validator identifies the content of .part, so that a resumed download cannot mix versions
+        meta = {'validator': response_headers.get('etag') or response_headers.get('last-modified')}
+        if http_code == 206:
+            size = response_headers.get('content-range', '').rpartition('/')[2]
+        else:
+            size = response_headers.get('content-length')
+        meta['size'] = int(size) if size and size.isdigit() else None
+        with open('{}.meta'.format(temp_file), 'w') as f:
+            f.write(jsoncodec.dumps(meta))
+
+    @staticmethod
+    def _remove_part(temp_file, keep_part=False):
+        for name in ([] if keep_part else [temp_file]) + ['{}.meta'.format(temp_file)]:
+            try:
+                os.remove(name)
+            except FileNotFoundError:
+                pass
+
+    def _download_single_cmd(self, endpoint, temp_file, headers, offset, progress, skip_query_admin):
+        curl_cmd = self._get_curl_cmd(endpoint, skip_query_admin)
+        curl_cmd.setopt(pycurl.HTTPGET, 1)
+        meta = self._read_part_meta(temp_file) if offset else {}
+        if offset:
+            curl_cmd.setopt(pycurl.RANGE, '{}-'.format(offset))
+            headers = headers + ['If-Range: {}'.format(meta['validator'])]
+        curl_cmd.setopt(pycurl.HTTPHEADER, headers)
+        download_progress = None
+        if progress:
+            download_progress = DownloadProgress(os.path.basename(temp_file[:-len('.part')]), offset)
+            curl_cmd.setopt(pycurl.NOPROGRESS, 0)
+            curl_cmd.setopt(pycurl.XFERINFOFUNCTION, download_progress.callback())
+        self._logger.info("Request METHOD: {} URL: {}{}".format("GET", self._url + endpoint,
+                                                                " from byte {}".format(offset) if offset else ""))
+        with open(temp_file, 'ab' if offset else 'wb') as stream:
+            writer = DownloadWriter(stream, on_body=partial(self._write_part_meta, temp_file))
+            curl_cmd.setopt(pycurl.HEADERFUNCTION, writer.header)
+            curl_cmd.setopt(pycurl.WRITEFUNCTION, writer.write)
+            try:
+                curl_cmd.perform()
+                http_code = curl_cmd.getinfo(pycurl.HTTP_CODE)
+                self._report_timings(curl_cmd, "GET", http_code)
+            except pycurl.error:
+                # Interrupted transfers are resumed by the next call, if anything was received
+                if not stream.tell():
+                    self._remove_part(temp_file)
+                raise
+            finally:
+                curl_cmd.close()
+                if download_progress:
+                    download_progress.show(end='\n')
+        self._logger.info("Response HTTPCODE: {}".format(http_code))
+        if http_code == 416 and offset:
+            # The file was already complete only if the server reports the size of .part
+            if writer.headers.get('content-range', '').rpartition('/')[2] == str(offset) and \
+                    meta.get('size') in (None, offset):
+                return http_code
+            self._logger.info("Partial download of {} does not match, restarting".format(endpoint))
+            self._remove_part(temp_file)
+            return self._download_single_cmd(endpoint, temp_file, headers[:-1], 0, progress, skip_query_admin)
+        if http_code >= 300:
+            self._remove_part(temp_file)
+        self.check_http_response(http_code, writer.error)
+        return http_code
+
+    def _get_ranges_size(self, endpoint, headers, skip_query_admin):
+        """
+        Returns the size of endpoint if the server accepts Range requests for it, or None
+        """
+        response_headers = {}
+
+        curl_cmd = self._get_curl_cmd(endpoint, skip_query_admin)
+        curl_cmd.setopt(pycurl.NOBODY, 1)
+        curl_cmd.setopt(pycurl.HTTPHEADER, headers)
+        curl_cmd.setopt(pycurl.HEADERFUNCTION, header_collector(response_headers))
+        self._logger.info("Request METHOD: {} URL: {}".format("HEAD", self._url + endpoint))
+        try:
+            http_code = self._perform(curl_cmd, "HEAD", BytesIO(), response_headers)
+        finally:
+            curl_cmd.close()
+        self._logger.info("Response HTTPCODE: {}".format(http_code))
+        if http_code != 200 or response_headers.get('accept-ranges') != 'bytes':
+            return None
+        try:
+            return int(response_headers.get('content-length'))
+        except (TypeError, ValueError):
+            return None
+
+    def _download_segments_cmd(self, endpoint, temp_file, headers, size, segments, progress, skip_query_admin):
+        segments = min(segments, size // self.MIN_SEGMENT_SIZE)
+        segment_size = -(-size // segments)
+        self._remove_part(temp_file)
+        with open(temp_file, 'wb') as stream:
+            stream.truncate(size)
+        download_progress = DownloadProgress(os.path.basename(temp_file[:-len('.part')])) if progress else None
+        multi = pycurl.CurlMulti()
+        transfers = []
+        completed = False
+        try:
+            for number, start in enumerate(range(0, size, segment_size)):
+                end = min(start + segment_size, size) - 1
+                curl_cmd = self._get_curl_cmd(endpoint, skip_query_admin)
+                curl_cmd.setopt(pycurl.HTTPGET, 1)
+                curl_cmd.setopt(pycurl.HTTPHEADER, headers)
+                curl_cmd.setopt(pycurl.RANGE, '{}-{}'.format(start, end))
+                stream = open(temp_file, 'r+b')
+                stream.seek(start)
+                writer = DownloadWriter(stream, expected_code=206)
+                curl_cmd.setopt(pycurl.HEADERFUNCTION, writer.header)
+                curl_cmd.setopt(pycurl.WRITEFUNCTION, writer.write)
+                if download_progress:
+                    curl_cmd.setopt(pycurl.NOPROGRESS, 0)
+                    curl_cmd.setopt(pycurl.XFERINFOFUNCTION, download_progress.callback(number))
+                transfers.append((curl_cmd, stream, writer))
+                multi.add_handle(curl_cmd)
+            self._logger.info("Request METHOD: {} URL: {} in {} segments".format("GET", self._url + endpoint,
+                                                                                len(transfers)))
+            active = len(transfers)
+            while active:
+                ret, active = multi.perform()
+                if ret == pycurl.E_CALL_MULTI_PERFORM:
+                    continue
+                if active:
+                    multi.select(1.0)
+            _, _, failed = multi.info_read()
+            if failed and not any(writer.aborted for _, _, writer in transfers):
+                raise pycurl.error(*failed[0][1:])
+            for curl_cmd, _, writer in transfers:
+                http_code = curl_cmd.getinfo(pycurl.HTTP_CODE)
+                self._report_timings(curl_cmd, "GET", http_code)
+                self._logger.info("Response HTTPCODE: {}".format(http_code))
+                if http_code != 206:
+                    self.check_http_response(http_code, writer.error)
+                    raise OsmHttpException("Error {}: Range requests not supported".format(http_code))
+            completed = True
+        finally:
+            for curl_cmd, stream, _ in transfers:
+                multi.remove_handle(curl_cmd)
+                curl_cmd.close()
+                stream.close()
+            multi.close()
+            # The segments are written at their offsets, so an incomplete file cannot be resumed
+            if not completed:
+                os.remove(temp_file)
+            if download_progress:
+                download_progress.show(end='\n')
+        return 200
+
+    def _response_text(self, data):
+        """
+        Returns the body written to data as text, or None if it is empty
+        """
+        body = data.getvalue()
+        if not body:
+            return None
+        data_text = body.decode()
+        if self._logger.isEnabledFor(verboselogs.VERBOSE):
             self._logger.verbose("Response DATA: {}".format(data_text))
-            return http_code, data_text
-        return http_code, None
+        return data_text
 
     def check_http_response(self, http_code, data):
         if http_code >= 300:
             resp = ""
-            if data.getvalue():
-                data_text = data.getvalue().decode()
+            body = data.getvalue()
+            if body:
+                data_text = body.decode()
                 self._logger.verbose("Response {} DATA: {}".format(http_code, data_text))
                 resp = ": " + data_text
             else:
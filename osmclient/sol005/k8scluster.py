@@ -118,9 +118,9 @@ class K8scluster(object):
         filter_string = ''
         if filter:
             filter_string = '?{}'.format(filter)
-        _, resp = self._http.get2_cmd('{}{}'.format(self._apiBase,filter_string))
+        _, resp = self._http.get_json_cmd('{}{}'.format(self._apiBase,filter_string))
         if resp:
-            return json.loads(resp) 
+            return resp
         return list()
 
     def get(self, name):
@@ -131,9 +131,7 @@ class K8scluster(object):
         if not utils.validate_uuid4(name):
             cluster_id = self.get_id(name)
         try:
-            _, resp = self._http.get2_cmd('{}/{}'.format(self._apiBase,cluster_id))
-            if resp:
-                resp = json.loads(resp)
+            _, resp = self._http.get_json_cmd('{}/{}'.format(self._apiBase,cluster_id))
             if not resp or '_id' not in resp:
                 raise ClientException('failed to get K8s cluster info: {}'.format(resp))
             return resp
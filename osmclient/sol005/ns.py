@@ -63,9 +63,9 @@ class Ns(object):
         filter_string = ''
         if filter:
             filter_string = '?{}'.format(filter)
-        _, resp = self._http.get2_cmd('{}{}'.format(self._apiBase,filter_string))
+        _, resp = self._http.get_json_cmd('{}{}'.format(self._apiBase,filter_string))
         if resp:
-            return json.loads(resp)
+            return resp
         return list()
 
     def get(self, name):
@@ -93,11 +93,11 @@ class Ns(object):
                     ns_id = ns['_id']
                     break
         try:
-            _, resp = self._http.get2_cmd('{}/{}'.format(self._apiBase, ns_id))
+            _, resp = self._http.get_json_cmd('{}/{}'.format(self._apiBase, ns_id))
             #resp = self._http.get_cmd('{}/{}/nsd_content'.format(self._apiBase, ns_id))
             #print(yaml.safe_dump(resp))
             if resp:
-                return json.loads(resp)
+                return resp
         except NotFound:
             raise NotFound("ns '{}' not found".format(name))
         raise NotFound("ns '{}' not found".format(name))
@@ -26,6 +26,7 @@ import magic
 from os.path import basename
 import logging
 import os.path
+import sys
 #from os import stat
 
 
@@ -48,10 +49,10 @@ class Nsd(object):
         filter_string = ''
         if filter:
             filter_string = '?{}'.format(filter)
-        _, resp = self._http.get2_cmd('{}{}'.format(self._apiBase, filter_string))
+        _, resp = self._http.get_json_cmd('{}{}'.format(self._apiBase, filter_string))
         #print(yaml.safe_dump(resp))
         if resp:
-            return json.loads(resp)
+            return resp
         return list()
 
     def get(self, name):
@@ -74,10 +75,10 @@ class Nsd(object):
             nsd = self.get(name)
             # It is redundant, since the previous one already gets the whole nsdinfo
             # The only difference is that a different primitive is exercised
-            _, resp = self._http.get2_cmd('{}/{}'.format(self._apiBase, nsd['_id']))
+            _, resp = self._http.get_json_cmd('{}/{}'.format(self._apiBase, nsd['_id']))
             #print(yaml.safe_dump(resp))
             if resp:
-                return json.loads(resp)
+                return resp
         except NotFound:
             raise NotFound("nsd '{}' not found".format(name))
         raise NotFound("nsd '{}' not found".format(name))
@@ -86,23 +87,8 @@ class Nsd(object):
         self._logger.debug("")
         # Call to get_token not required, because will be implicitly called by get.
         nsd = self.get(name)
-        headers = self._client._headers
-        headers['Accept'] = 'application/binary'
-        http_code, resp = self._http.get2_cmd('{}/{}/{}'.format(self._apiBase, nsd['_id'], thing))
-        #print('HTTP CODE: {}'.format(http_code))
-        #print('RESP: {}'.format(resp))
-        #if http_code in (200, 201, 202, 204):
-        if resp:
-            #store in a file
-            return json.loads(resp)
-        else:
-            msg = resp or ""
-        #    if resp:
-        #        try:
-        #            msg = json.loads(resp)
-        #        except ValueError:
-        #            msg = resp
-            raise ClientException("failed to get {} from {} - {}".format(thing, name, msg))
+        self._http.download_cmd('{}/{}/{}'.format(self._apiBase, nsd['_id'], thing), filename,
+                                progress=sys.stderr.isatty())
 
     def get_descriptor(self, name, filename):
         self._logger.debug("")
@@ -139,12 +125,16 @@ class Nsd(object):
             #         msg = resp
             raise ClientException("failed to delete nsd {} - {}".format(name, msg))
 
-    def create(self, filename, overwrite=None, update_endpoint=None, skip_charm_build=False):
+    def create(self, filename, overwrite=None, update_endpoint=None, skip_charm_build=False,
+               skip_if_unchanged=False):
         self._logger.debug("")
         if os.path.isdir(filename):
             filename = filename.rstrip('/')
-            filename = self._client.package_tool.build(filename, skip_validation=False, skip_charm_build=skip_charm_build)
-            self.create(filename, overwrite=overwrite, update_endpoint=update_endpoint)
+            # A reproducible build gives the same checksum if the package folder has not changed
+            filename = self._client.package_tool.build(filename, skip_validation=False, skip_charm_build=skip_charm_build,
+                                                       reproducible=skip_if_unchanged)
+            self.create(filename, overwrite=overwrite, update_endpoint=update_endpoint,
+                        skip_if_unchanged=skip_if_unchanged)
         else:
             self._client.get_token()
             mime_type = magic.from_file(filename, mime=True)
@@ -170,6 +160,14 @@ class Nsd(object):
                          filename, mime_type)
                   )
             headers["Content-File-MD5"] = utils.md5(filename)
+            # Overwritten fields change the descriptor stored by OSM, so the upload cannot be skipped
+            if skip_if_unchanged and not update_endpoint and not overwrite:
+                package = utils.get_unchanged_package(self._http, '{}{}/ns_descriptors'.format(
+                    self._apiName, self._apiVersion), filename, headers["Content-File-MD5"])
+                if package:
+                    self._logger.info('Package {} unchanged, upload skipped'.format(filename))
+                    print(package['_id'])
+                    return
             http_header = ['{}: {}'.format(key,val)
                           for (key,val) in list(headers.items())]
             self._http.set_http_header(http_header)
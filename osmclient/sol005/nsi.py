@@ -64,9 +64,9 @@ class Nsi(object):
         filter_string = ''
         if filter:
             filter_string = '?{}'.format(filter)
-        _, resp = self._http.get2_cmd('{}{}'.format(self._apiBase,filter_string))
+        _, resp = self._http.get_json_cmd('{}{}'.format(self._apiBase,filter_string))
         if resp:
-            return json.loads(resp)
+            return resp
         return list()
 
     def get(self, name):
@@ -94,11 +94,11 @@ class Nsi(object):
                     nsi_id = nsi['_id']
                     break
         try:
-            _, resp = self._http.get2_cmd('{}/{}'.format(self._apiBase, nsi_id))
+            _, resp = self._http.get_json_cmd('{}/{}'.format(self._apiBase, nsi_id))
             #resp = self._http.get_cmd('{}/{}/nsd_content'.format(self._apiBase, nsi_id))
             #print(yaml.safe_dump(resp))
             if resp:
-                return json.loads(resp)
+                return resp
         except NotFound:
             raise NotFound("nsi '{}' not found".format(name))
         raise NotFound("nsi {} not found".format(name))
@@ -25,6 +25,7 @@ import json
 import magic
 import logging
 import os.path
+import sys
 #from os import stat
 #from os.path import basename
 
@@ -46,10 +47,10 @@ class Nst(object):
         filter_string = ''
         if filter:
             filter_string = '?{}'.format(filter)
-        _, resp = self._http.get2_cmd('{}{}'.format(self._apiBase, filter_string))
+        _, resp = self._http.get_json_cmd('{}{}'.format(self._apiBase, filter_string))
         #print(yaml.safe_dump(resp))
         if resp:
-            return json.loads(resp)
+            return resp
         return list()
 
     def get(self, name):
@@ -71,10 +72,10 @@ class Nst(object):
         # It is redundant, since the previous one already gets the whole nstinfo
         # The only difference is that a different primitive is exercised
         try:
-            _, resp = self._http.get2_cmd('{}/{}'.format(self._apiBase, nst['_id']))
+            _, resp = self._http.get_json_cmd('{}/{}'.format(self._apiBase, nst['_id']))
             #print(yaml.safe_dump(resp))
             if resp:
-                return json.loads(resp)
+                return resp
         except NotFound:
             raise NotFound("nst '{}' not found".format(name))
         raise NotFound("nst '{}' not found".format(name))
@@ -82,26 +83,11 @@ class Nst(object):
     def get_thing(self, name, thing, filename):
         self._logger.debug("")
         nst = self.get(name)
-        headers = self._client._headers
-        headers['Accept'] = 'application/binary'
         try:
-            http_code, resp = self._http.get2_cmd('{}/{}/{}'.format(self._apiBase, nst['_id'], thing))
+            self._http.download_cmd('{}/{}/{}'.format(self._apiBase, nst['_id'], thing), filename,
+                                    progress=sys.stderr.isatty())
         except NotFound:
             raise NotFound("nst '{} 'not found".format(name))
-        #print('HTTP CODE: {}'.format(http_code))
-        #print('RESP: {}'.format(resp))
-        #if http_code in (200, 201, 202, 204):
-        if resp:
-            #store in a file
-            return json.loads(resp)
-        #else:
-        #    msg = ""
-        #    if resp:
-        #        try:
-        #            msg = json.loads(resp)
-        #        except ValueError:
-        #            msg = resp
-        #    raise ClientException("failed to get {} from {} - {}".format(thing, name, msg))
 
     def get_descriptor(self, name, filename):
         self._logger.debug("")
@@ -138,7 +124,7 @@ class Nst(object):
             #         msg = resp
             raise ClientException("failed to delete nst {} - {}".format(name, msg))
 
-    def create(self, filename, overwrite=None, update_endpoint=None):
+    def create(self, filename, overwrite=None, update_endpoint=None, skip_if_unchanged=False):
         self._logger.debug("")
         if os.path.isdir(filename):
             charm_folder = filename.rstrip('/')
@@ -149,12 +135,13 @@ class Nst(object):
                         if result["valid"] != "OK":
                             raise ClientException('There was an error validating the file: {} '
                                                   'with error: {}'.format(result["path"], result["error"]))
-            result = self._client.package_tool.build(charm_folder)
+            # A reproducible build gives the same checksum if the package folder has not changed
+            result = self._client.package_tool.build(charm_folder, reproducible=skip_if_unchanged)
             if 'Created' in result:
                 filename = "{}.tar.gz".format(charm_folder)
             else:
                 raise ClientException('Failed in {}tar.gz creation'.format(charm_folder))
-            self.create(filename, overwrite, update_endpoint)
+            self.create(filename, overwrite, update_endpoint, skip_if_unchanged=skip_if_unchanged)
         else:
             self._client.get_token()
             mime_type = magic.from_file(filename, mime=True)
@@ -179,6 +166,14 @@ class Nst(object):
                              filename, mime_type)
                       )
             headers["Content-File-MD5"] = utils.md5(filename)
+            # Overwritten fields change the descriptor stored by OSM, so the upload cannot be skipped
+            if skip_if_unchanged and not update_endpoint and not overwrite:
+                package = utils.get_unchanged_package(self._http, '{}{}/netslice_templates'.format(
+                    self._apiName, self._apiVersion), filename, headers["Content-File-MD5"])
+                if package:
+                    self._logger.info('Package {} unchanged, upload skipped'.format(filename))
+                    print(package['_id'])
+                    return
             http_header = ['{}: {}'.format(key,val)
                           for (key,val) in list(headers.items())]
             self._http.set_http_header(http_header)
@@ -18,20 +18,58 @@ OSM Repo API handling
 from osmclient.common.exceptions import ClientException
 from osmclient.sol005.repo import Repo
 from osmclient.common.package_tool import PackageTool
+from osmclient.common.package_index import PackageIndex
+from osmclient.common import utils
 import requests
 import logging
 import tempfile
 from shutil import copyfile, rmtree
 import yaml
-import tarfile
 import glob
 from packaging import version as versioning
 import time
-from os import listdir, mkdir, getcwd, remove
-from os.path import isfile, isdir, join, abspath
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import threading
+import json
+import os
+from os import listdir, mkdir, makedirs, getcwd, remove, stat, lstat, walk, fdopen, chmod, replace
+from os.path import isfile, isdir, join, abspath, relpath, dirname, basename
 import hashlib
 from osm_im.validation import Validation as validation_im
-import ruamel.yaml
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
+# File in the index directory recording the source and signature of every indexed artifact
+MANIFEST_FILE = '.index_manifest.yaml'
+CACHE_DIR = join(os.getenv('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'osmclient')
+# Local cache of the indexes of the OSM repositories
+REPO_CACHE_DIR = os.getenv('OSM_REPO_CACHE_DIR', join(CACHE_DIR, 'repos'))
+# Local store of the packages downloaded from the OSM repositories
+PKG_CACHE_DIR = os.getenv('OSM_PKG_CACHE_DIR', join(CACHE_DIR, 'packages'))
+# Size of the chunks written to disk while downloading a package
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Connect and read timeouts of the requests to the OSM repositories
+REPO_TIMEOUT = (10, 60)
+# Maximum number of repositories queried concurrently
+REPO_FETCH_WORKERS = 8
+# Top-level descriptor of a package
+DESCRIPTOR_PATTERN = r'.*\.ya?ml$'
+# index.yaml is written once at the end of the indexation and, for big repositories, every this many artifacts
+INDEX_SAVE_INTERVAL = 100
+# Index files of a repository, in order of preference. index.json holds the same content as index.yaml
+# and is much faster to parse
+INDEX_FILES = ('index.json', 'index.yaml')
+# Seconds during which an index.json found missing in a repository is not requested again
+MISSING_INDEX_TTL = 24 * 3600
+
+
+def _process_artifact(path, source):
+    """
+        Entry point of the repo_index worker processes. See OSMRepo.process_artifact
+    """
+    return OSMRepo().process_artifact(path, source)
 
 
 class OSMRepo(Repo):
@@ -44,12 +82,110 @@ class OSMRepo(Repo):
         self._logger = logging.getLogger('osmclient')
         self._apiBase = '{}{}{}'.format(self._apiName,
                                         self._apiVersion, self._apiResource)
+        self._session = None
+        self._repo_indexes = {}
+        self._repo_indexes_lock = threading.Lock()
+        self._package_indexes = {}
+
+    def get_session(self):
+        """
+            Returns the HTTP session shared by all the requests to the repositories, so connections are reused
+        """
+        if self._session is None:
+            self._session = requests.Session()
+        return self._session
+
+    def get_repo_index(self, url):
+        """
+            Returns the parsed index of the repository at url, index.json if the repository
+            provides it or index.yaml otherwise.
+            The index is parsed once per process, and kept in a local cache that is revalidated
+            against the repository with ETag/Last-Modified. A missing index.json is remembered for
+            MISSING_INDEX_TTL seconds
+            :param url: repository url
+            :return: index content
+        """
+        with self._repo_indexes_lock:
+            if url in self._repo_indexes:
+                return self._repo_indexes[url]
+        cache_dir = join(REPO_CACHE_DIR, hashlib.sha1(url.encode()).hexdigest())
+        validators_file = join(cache_dir, 'validators.json')
+        validators = {}
+        if isfile(validators_file):
+            try:
+                with open(validators_file) as f:
+                    validators = json.load(f)
+            except (OSError, ValueError) as e:
+                self._logger.warning('Ignoring the cached validators of repository {}: {}'.format(url, e))
+            if not isinstance(validators, dict):
+                validators = {}
+        cache_file = None
+        validators_changed = False
+        for index_file in INDEX_FILES:
+            headers = {}
+            file_validators = validators.get(index_file) or {}
+            if index_file != INDEX_FILES[-1] and \
+                    time.time() - file_validators.get('missing', 0) < MISSING_INDEX_TTL:
+                continue
+            if isfile(join(cache_dir, index_file)):
+                if file_validators.get('etag'):
+                    headers['If-None-Match'] = file_validators['etag']
+                if file_validators.get('last_modified'):
+                    headers['If-Modified-Since'] = file_validators['last_modified']
+            try:
+                r = self.get_session().get('{}/{}'.format(url, index_file), headers=headers, timeout=REPO_TIMEOUT)
+            except requests.RequestException as e:
+                cached = [f for f in INDEX_FILES if isfile(join(cache_dir, f))]
+                if not cached:
+                    raise
+                self._logger.warning('repository in url {} unreachable, using cached index: {}'.format(url, e))
+                cache_file = join(cache_dir, cached[0])
+                break
+            if r.status_code == 304:
+                self._logger.debug('{} of repository {} not modified'.format(index_file, url))
+                cache_file = join(cache_dir, index_file)
+                break
+            elif r.status_code == 200:
+                cache_file = join(cache_dir, index_file)
+                makedirs(cache_dir, exist_ok=True)
+                self.atomic_write(r.content, cache_file)
+                validators[index_file] = {'etag': r.headers.get('ETag'),
+                                          'last_modified': r.headers.get('Last-Modified')}
+                validators_changed = True
+                break
+            elif 400 <= r.status_code < 500:
+                # Missing or forbidden, as in object stores. Recorded, so that the next listings go straight
+                # to the following index file
+                validators[index_file] = {'missing': time.time()}
+                validators_changed = True
+                if isfile(join(cache_dir, index_file)):
+                    remove(join(cache_dir, index_file))
+            else:
+                raise Exception('repository in url {} unreachable'.format(url))
+        if not cache_file:
+            raise Exception('repository in url {} has no index'.format(url))
+        if validators_changed:
+            makedirs(cache_dir, exist_ok=True)
+            self.atomic_write(json.dumps(validators).encode(), validators_file)
+        repo_index = self.read_index_file(cache_file)
+        with self._repo_indexes_lock:
+            self._repo_indexes[url] = repo_index
+        return repo_index
 
     def pkg_list(self, pkgtype, filter=None, repo=None):
         """
-            Returns a repo based on name or id
+            Returns the packages of the repositories matching filter, see PackageIndex for the filter syntax
         """
         self._logger.debug("")
+        return self.package_index(pkgtype, repo).search(filter)
+
+    def package_index(self, pkgtype, repo=None):
+        """
+            Returns the PackageIndex of the pkgtype packages of the repositories, built once per client
+        """
+        self._logger.debug("")
+        if (pkgtype, repo) in self._package_indexes:
+            return self._package_indexes[(pkgtype, repo)]
         self._client.get_token()
         # Get OSM registered repository list
         repositories = self.list()
@@ -58,97 +194,213 @@ class OSMRepo(Repo):
         if not repositories:
             raise ClientException('Not repository found')
 
-        vnf_repos = []
-        for repository in repositories:
+        def fetch(repository):
             try:
-                r = requests.get('{}/index.yaml'.format(repository.get('url')))
-
-                if r.status_code == 200:
-                    repo_list = yaml.safe_load(r.text)
-                    vnf_packages = repo_list.get('{}_packages'.format(pkgtype))
-                    for repo in vnf_packages:
-                        versions = vnf_packages.get(repo)
-                        latest = versions.get('latest')
-                        del versions['latest']
-                        for version in versions:
-                            latest_version = False
-                            if version == latest:
-                                latest_version = True
-                            vnf_repos.append({'vendor': versions[version].get("vendor"),
-                                              'name': versions[version].get("name"),
-                                              'version': version,
-                                              'description': versions[version].get("description"),
-                                              'location': versions[version].get("path"),
-                                              'repository': repository.get('name'),
-                                              'repourl': repository.get('url'),
-                                              'latest': latest_version
-                                              })
-                else:
-                    raise Exception('repository in url {} unreachable'.format(repository.get('url')))
+                return repository, self.get_repo_index(repository.get('url'))
             except Exception as e:
-                logging.error("Error cannot read from repository {} '{}': {}".format(repository['name'], repository['url'], e))
-                continue
+                logging.error("Error cannot read from repository {} '{}': {}".format(repository['name'],
+                                                                                     repository['url'], e))
+                return repository, None
+
+        # The indexes of all the repositories are fetched concurrently
+        with ThreadPoolExecutor(max_workers=min(len(repositories), REPO_FETCH_WORKERS)) as executor:
+            repo_indexes = list(executor.map(fetch, repositories))
 
-        vnf_repos_filtered = []
-        if filter:
-            for vnf_repo in vnf_repos:
-                for k, v in vnf_repo.items():
-                    if v:
-                        kf, vf = filter.split('=')
-                        if k == kf and vf in v:
-                            vnf_repos_filtered.append(vnf_repo)
-                            break
-            vnf_repos = vnf_repos_filtered
-        return vnf_repos
+        vnf_repos = []
+        for repository, repo_list in repo_indexes:
+            if not repo_list:
+                continue
+            vnf_packages = repo_list.get('{}_packages'.format(pkgtype)) or {}
+            for package_id in vnf_packages:
+                versions = vnf_packages.get(package_id)
+                latest = versions.get('latest')
+                for version in versions:
+                    if version == 'latest':
+                        continue
+                    latest_version = False
+                    if version == latest:
+                        latest_version = True
+                    vnf_repos.append({'vendor': versions[version].get("vendor"),
+                                      'name': versions[version].get("name"),
+                                      'version': version,
+                                      'description': versions[version].get("description"),
+                                      'location': versions[version].get("path"),
+                                      'checksum': versions[version].get("checksum"),
+                                      'size': versions[version].get("size"),
+                                      'repository': repository.get('name'),
+                                      'repourl': repository.get('url'),
+                                      'latest': latest_version
+                                      })
+        package_index = PackageIndex(vnf_repos)
+        self._package_indexes[(pkgtype, repo)] = package_index
+        return package_index
 
     def get_pkg(self, pkgtype, name, repo, filter, version):
         """
             Returns the filename of the PKG downloaded to disk
+            :param version: 'latest', an exact version or constraints such as '>=1.2,<2'
+        """
+        self._logger.debug("")
+        pkg = self.package_index(pkgtype, repo).resolve(name, version, filter=filter)
+        if not pkg:
+            raise ClientException("{} {} {} not found at repo {}".format(pkgtype, name, version, repo))
+        # Packages are kept in a local store, keyed by repository, name and version. These come from the
+        # remote index, and must not lead outside of the store of the repository
+        f_name = utils.safe_join(join(PKG_CACHE_DIR, hashlib.sha1(pkg.get('repourl').encode()).hexdigest()),
+                                 pkg.get('name'), pkg.get('version'), basename(pkg.get('location') or ''))
+        if isfile(f_name) and (not pkg.get('checksum') or self.md5(f_name) == pkg.get('checksum')):
+            self._logger.debug('Package {} found in the local store'.format(f_name))
+            return f_name
+        makedirs(dirname(f_name), exist_ok=True)
+        self.download_file('{}{}'.format(pkg.get('repourl'), pkg.get('location')), f_name,
+                           checksum=pkg.get('checksum'))
+        return f_name
+
+    def download_file(self, url, file_name, checksum=None, resume=False):
+        """
+            Downloads url to file_name, streaming it to disk in chunks
+            :param url: url of the file
+            :param file_name: destination path. The file is written to file_name.part and renamed when complete
+            :param checksum: expected md5 of the file. If the download does not match it, it is discarded
+            :param resume: if file_name.part exists, only the remaining bytes are requested
+        """
+        self._logger.debug("Downloading {} to {}".format(url, file_name))
+        temp_file = '{}.part'.format(file_name)
+        md5_hash = hashlib.md5()
+        headers = {}
+        offset = 0
+        if resume and isfile(temp_file):
+            offset = stat(temp_file).st_size
+            headers['Range'] = 'bytes={}-'.format(offset)
+        with self.get_session().get(url, stream=True, headers=headers, timeout=REPO_TIMEOUT) as r:
+            if offset and r.status_code == 206:
+                self._logger.debug("Resuming {} from byte {}".format(url, offset))
+                with open(temp_file, 'rb') as f:
+                    for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b''):
+                        md5_hash.update(chunk)
+                mode = 'ab'
+            elif offset and r.status_code == 416:
+                # The partial file may already be complete, otherwise it is downloaded again
+                if checksum and self.md5(temp_file) == checksum:
+                    replace(temp_file, file_name)
+                    return
+                remove(temp_file)
+                return self.download_file(url, file_name, checksum=checksum)
+            elif r.status_code == 200:
+                mode = 'wb'
+            else:
+                raise ClientException("Package not found")
+            with open(temp_file, mode) as f:
+                for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+                    md5_hash.update(chunk)
+        if checksum and md5_hash.hexdigest() != checksum:
+            remove(temp_file)
+            raise ClientException("Checksum mismatch downloading {}: expected {}, got {}".format(
+                url, checksum, md5_hash.hexdigest()))
+        replace(temp_file, file_name)
+
+    def repo_sync(self, repo, destination, jobs=REPO_FETCH_WORKERS):
+        """
+            Mirrors a repository registered in OSM into a local folder
+            Only the packages that are missing in the local index, or whose checksum differs, are downloaded.
+            Interrupted downloads are resumed and the local index is updated as packages arrive
+            :param repo: name of the OSM repository
+            :param destination: local folder, with the layout created by repo_index
+            :param jobs: number of concurrent downloads
         """
         self._logger.debug("")
         self._client.get_token()
-        f = None
-        f_name = None
-        # Get OSM registered repository list
-        pkgs = self.pkg_list(pkgtype, filter, repo)
-        for pkg in pkgs:
-            if pkg.get('repository') == repo and pkg.get('name') == name:
-                if 'latest' in version:
-                    if not pkg.get('latest'):
+        repositories = [r for r in self.list() if r.get('name') == repo or r.get('_id') == repo]
+        if not repositories:
+            raise ClientException('Repository {} not found'.format(repo))
+        url = repositories[0].get('url').rstrip('/')
+        remote_index = self.get_repo_index(url)
+        destination = abspath(destination)
+        self.init_directory(destination)
+        index = self.load_index(destination)
+        pending = []
+        unchanged = 0
+        invalid = 0
+        for package_type in ('vnf', 'ns'):
+            remote_packages = remote_index.get('{}_packages'.format(package_type)) or {}
+            local_packages = index.setdefault('{}_packages'.format(package_type), {})
+            for package_id, versions in remote_packages.items():
+                for version, data in versions.items():
+                    if version == 'latest':
                         continue
-                    else:
-                        version = pkg.get('version')
-                if pkg.get('version') == version:
-                    r = requests.get('{}{}'.format(pkg.get('repourl'), pkg.get('location')), stream=True)
-                    if r.status_code != 200:
-                        raise ClientException("Package not found")
-
-                    with tempfile.NamedTemporaryFile(delete=False) as f:
-                        f.write(r.raw.read())
-                        f_name = f.name
-                    if not f_name:
-                        raise ClientException("{} {} not found at repo {}".format(pkgtype,name, repo))
-        return f_name
+                    try:
+                        # The path comes from the remote index, it must not escape destination
+                        file_name = utils.safe_join(destination, data.get('path'))
+                    except ClientException as e:
+                        invalid += 1
+                        self._logger.error('Invalid package {} {} in repository {}: {}'.format(
+                            package_id, version, url, e))
+                        continue
+                    local_data = local_packages.get(package_id, {}).get(version)
+                    if local_data and local_data.get('checksum') == data.get('checksum') and isfile(file_name):
+                        unchanged += 1
+                        continue
+                    pending.append((package_type, package_id, version, data, file_name))
+        print("{} packages up to date, {} to be downloaded".format(unchanged, len(pending)))
+
+        def download(package):
+            _, _, _, data, file_name = package
+            path = '/' + relpath(file_name, os.path.realpath(destination))
+            makedirs(dirname(file_name), exist_ok=True)
+            self.download_file('{}{}'.format(url, path), file_name, checksum=data.get('checksum'), resume=True)
+            self.download_file('{}{}/metadata.yaml'.format(url, dirname(path).rstrip('/')),
+                               join(dirname(file_name), 'metadata.yaml'))
+            return package
+
+        failed = invalid
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(download, package) for package in pending]
+            try:
+                for count, future in enumerate(futures, 1):
+                    try:
+                        package_type, package_id, version, data, _ = future.result()
+                    except Exception as e:
+                        failed += 1
+                        self._logger.error('Error downloading from repository {}: {}'.format(url, e))
+                        continue
+                    versions = index['{}_packages'.format(package_type)].setdefault(package_id, {})
+                    versions[version] = data
+                    # The latest version of the remote index, unless it was not downloaded (yet)
+                    latest = remote_index['{}_packages'.format(package_type)][package_id].get('latest')
+                    if latest not in versions or latest == 'latest':
+                        latest = PackageIndex({'name': package_id, 'version': v}
+                                              for v in versions if v != 'latest').resolve(package_id)['version']
+                    versions['latest'] = latest
+                    if count % INDEX_SAVE_INTERVAL == 0:
+                        self.save_index(destination, index)
+            finally:
+                for future in futures:
+                    future.cancel()
+                self.save_index(destination, index)
+        print("{} packages downloaded, {} failed".format(len(pending) + invalid - failed, failed))
+        if failed:
+            raise ClientException('{} packages could not be downloaded from repository {}'.format(failed, repo))
 
     def pkg_get(self, pkgtype, name, repo, version, filter):
 
         pkg_name = self.get_pkg(pkgtype, name, repo, filter, version)
         if not pkg_name:
             raise ClientException('Package not found')
-        folder, descriptor = self.zip_extraction(pkg_name)
-        with open(descriptor) as pkg:
-            pkg_descriptor = yaml.safe_load(pkg)
-        rmtree(folder, ignore_errors=False)
+        _, descriptor_data = self.get_pkg_descriptor(pkg_name)
+        pkg_descriptor = yaml.load(descriptor_data, Loader=SafeLoader)
         if ((pkgtype == 'vnf' and (pkg_descriptor.get('vnfd') or pkg_descriptor.get('vnfd:vnfd_catalog'))) or
                 (pkgtype == 'ns' and (pkg_descriptor.get('nsd') or pkg_descriptor.get('nsd:nsd_catalog')))):
             raise ClientException('Wrong Package type')
         return pkg_descriptor
 
-    def repo_index(self, origin=".", destination='.'):
+    def repo_index(self, origin=".", destination='.', jobs=1):
         """
             Repo Index main function
             :param origin: origin directory for getting all the artifacts
             :param destination: destination folder for create and index the valid artifacts
+            :param jobs: number of processes validating and building the artifacts. The index is
+                         always updated by the calling process
         """
         if destination == '.':
             if origin == destination:
@@ -163,16 +415,102 @@ class OSMRepo(Repo):
             destination = join(getcwd(), destination)
 
         self.init_directory(destination)
-        artifacts = [f for f in listdir(origin) if isfile(join(origin, f))]
-        directories = [f for f in listdir(origin) if isdir(join(origin, f))]
-        for artifact in artifacts:
-            self.register_artifact_in_repository(join(origin, artifact), destination, source='file')
-        for artifact in directories:
-            self.register_artifact_in_repository(join(origin, artifact), destination, source='directory')
+        manifest = self.load_manifest(destination)
+        artifacts = [(join(origin, f), 'file') for f in listdir(origin) if isfile(join(origin, f))]
+        artifacts += [(join(origin, f), 'directory') for f in listdir(origin) if isdir(join(origin, f))]
+        # Only new or changed artifacts are processed
+        changed_artifacts = []
+        for path, source in artifacts:
+            signature = self.artifact_signature(path, source)
+            entry = manifest.get(path)
+            if entry and entry.get('signature') == signature and \
+                    isfile(join(destination, entry['package_type'], entry['id'], entry['version'], 'metadata.yaml')):
+                continue
+            changed_artifacts.append((path, source, signature))
+        print("{} artifacts unchanged since the last indexation, {} to be processed".format(
+            len(artifacts) - len(changed_artifacts), len(changed_artifacts)))
+        index = self.load_index(destination)
+        executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+        try:
+            # Results are merged in submission order, so the index does not depend on the scheduling
+            processed_artifacts = [(path, source, signature,
+                                    executor.submit(_process_artifact, path, source) if executor else None)
+                                   for path, source, signature in changed_artifacts]
+            for count, (path, source, signature, processed) in enumerate(processed_artifacts, 1):
+                result = self.register_artifact_in_repository(path, destination, source, processed=processed,
+                                                              index=index, previous=manifest.get(path))
+                if result and source == 'directory':
+                    # The build writes checksums.txt and charms/builds in the folder, the signature recorded is
+                    # the one the next run will find
+                    signature = self.artifact_signature(path, source)
+                self.update_manifest(manifest, path, signature, result)
+                if count % INDEX_SAVE_INTERVAL == 0:
+                    self.save_index(destination, index)
+                    self.save_manifest(destination, manifest)
+        finally:
+            if executor:
+                executor.shutdown()
+            # The index is saved before the manifest, so the manifest never refers to packages missing in the index
+            self.save_index(destination, index)
+            self.save_manifest(destination, manifest)
         print("\nFinal Results: ")
         print("VNF Packages Indexed: " + str(len(glob.glob(destination + "/vnf/*/*/metadata.yaml"))))
         print("NS Packages Indexed: " + str(len(glob.glob(destination + "/ns/*/*/metadata.yaml"))))
 
+    def artifact_signature(self, path, source):
+        """
+            Cheap signature of an artifact, used to detect changes without reading its content
+            :param path: artifact path
+            :param source: 'file' or 'directory'
+            :return: dict with the size and the mtime of a file, or the size, number of files and a
+                     digest of the names, sizes and mtimes of the files in a directory
+        """
+        if source != 'directory':
+            stat_result = stat(path)
+            return {'size': stat_result.st_size, 'mtime': stat_result.st_mtime}
+        signature = {'size': 0, 'files': 0}
+        file_list = []
+        for root, dirs, files in walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if root == path and name == 'checksums.txt':
+                    # Rewritten in the artifact folder by every package build
+                    continue
+                stat_result = lstat(join(root, name))
+                file_list.append('{} {} {}'.format(relpath(join(root, name), path), stat_result.st_size,
+                                                   stat_result.st_mtime))
+                signature['size'] += stat_result.st_size
+                signature['files'] += 1
+        signature['digest'] = hashlib.sha1('\n'.join(file_list).encode()).hexdigest()
+        return signature
+
+    def load_manifest(self, destination):
+        """
+            Loads the manifest of the indexed artifacts: source path -> signature, package type, id and version
+            :param destination: index repository path
+            :return: manifest dict
+        """
+        manifest_file = join(destination, MANIFEST_FILE)
+        if not isfile(manifest_file):
+            return {}
+        with open(manifest_file) as f:
+            return yaml.load(f, Loader=SafeLoader) or {}
+
+    def update_manifest(self, manifest, path, signature, result):
+        """
+            Records an artifact in the manifest if it was registered, and forgets it otherwise
+            :param result: package type and fields returned by register_artifact_in_repository
+        """
+        if result:
+            package_type, fields = result
+            manifest[path] = {'signature': signature, 'package_type': package_type,
+                              'id': fields.get('id'), 'version': fields.get('version')}
+        else:
+            manifest.pop(path, None)
+
+    def save_manifest(self, destination, manifest):
+        self.atomic_yaml_dump(manifest, join(destination, MANIFEST_FILE))
+
     def md5(self, fname):
         """
             Checksum generator
@@ -228,23 +566,17 @@ class OSMRepo(Repo):
                           fields.get('version'))
         return fields
 
-    def zip_extraction(self, file_name):
+    def get_pkg_descriptor(self, file_name):
         """
-            Validation of artifact.
-            :param file: file path
-            :return: status details, status, fields, package_type
+            Reads the descriptor of a package, directly from the tar stream and without extracting the package
+            :param file_name: package path
+            :return: descriptor member name, descriptor content
         """
-        self._logger.debug("Decompressing package file")
-        temp_file = '/tmp/{}'.format(file_name.split('/')[-1])
-        if file_name != temp_file:
-            copyfile(file_name, temp_file)
-        with tarfile.open(temp_file, "r:gz") as tar:
-            folder = tar.getnames()[0].split('/')[0]
-            tar.extractall()
-
-        remove(temp_file)
-        descriptor_file = glob.glob('{}/*.y*ml'.format(folder))[0]
-        return folder, descriptor_file
+        self._logger.debug("Reading descriptor from package file")
+        descriptor_file, descriptor_data = utils.get_descriptor_from_pkg(file_name, pattern=DESCRIPTOR_PATTERN)
+        if descriptor_file is None:
+            raise ClientException('No descriptor was found in {}'.format(file_name))
+        return descriptor_file, descriptor_data.decode()
 
     def validate_artifact(self, path, source):
         """
@@ -253,17 +585,15 @@ class OSMRepo(Repo):
             :return: status details, status, fields, package_type
         """
         package_type = ''
-        folder = ''
         try:
             if source == 'directory':
                 descriptor_file = glob.glob('{}/*.y*ml'.format(path))[0]
+                self._logger.debug("Opening descriptor file: {}".format(descriptor_file))
+                with open(descriptor_file, 'r') as f:
+                    descriptor_data = f.read()
             else:
-                folder, descriptor_file = self.zip_extraction(path)
+                descriptor_file, descriptor_data = self.get_pkg_descriptor(path)
 
-            self._logger.debug("Opening descriptor file: {}".format(descriptor_file))
-
-            with open(descriptor_file, 'r') as f:
-                descriptor_data = f.read()
             validation = validation_im()
             desc_type, descriptor_data = validation.yaml_validation(descriptor_data)
             validation_im.pyangbind_validation(self, desc_type, descriptor_data)
@@ -279,31 +609,48 @@ class OSMRepo(Repo):
             return {"detail": "{}D successfully validated".format(package_type.upper()),
                     "code": "OK"}, True, fields, package_type
         except Exception as e:
-            # Delete the folder we just created
             return {"detail": str(e)}, False, {}, package_type
-        finally:
-            if folder:
-                rmtree(folder, ignore_errors=True)
 
-    def register_artifact_in_repository(self, path, destination, source):
+    def process_artifact(self, path, source):
+        """
+            Validation of one artifact, building it first if it is a directory
+            :param path: artifact path
+            :param source: 'file' or 'directory'
+            :return: package path, package type, fields
+        """
+        pt = PackageTool()
+        _, valid, fields, package_type = self.validate_artifact(path, source)
+        if not valid:
+            raise Exception('{} {} Not well configured.'.format(package_type.upper(), str(path)))
+        if source == 'directory':
+            path = pt.build(path, reproducible=True)
+        fields['checksum'] = self.md5(path)
+        return path, package_type, fields
+
+    def register_artifact_in_repository(self, path, destination, source, processed=None, index=None,
+                                        previous=None):
         """
             Registration of one artifact in a repository
             file: VNF or NS
             destination: path for index creation
+            processed: future with the result of process_artifact, if already submitted to a worker
+            index: index.yaml content to update in memory. If None, index.yaml is updated on disk
+            previous: manifest entry of the artifact, if it was indexed before. A changed artifact that keeps
+                      its package type, id and version replaces the package indexed from it
+            :return: package type and fields of the artifact, None if it could not be registered
         """
-        pt = PackageTool()
         compresed = False
         try:
-            fields = {}
-            _, valid, fields, package_type = self.validate_artifact(path, source)
-            if not valid:
-                raise Exception('{} {} Not well configured.'.format(package_type.upper(), str(path)))
+            if processed:
+                path, package_type, fields = processed.result()
             else:
-                if source == 'directory':
-                    path = pt.build(path)
-                    compresed = True
-                fields['checksum'] = self.md5(path)
-                self.indexation(destination, path, package_type, fields)
+                path, package_type, fields = self.process_artifact(path, source)
+            compresed = source == 'directory'
+            replace_package = bool(previous) and (previous.get('package_type'), previous.get('id'),
+                                                  previous.get('version')) == \
+                (package_type, fields.get('id'), fields.get('version'))
+            if self.indexation(destination, path, package_type, fields, index=index, replace=replace_package):
+                return package_type, fields
 
         except Exception as e:
             self._logger.debug("Error registering artifact in Repository: {}".format(e))
@@ -312,48 +659,100 @@ class OSMRepo(Repo):
             if source == 'directory' and compresed:
                 remove(path)
 
-    def indexation(self, destination, path, package_type, fields):
+    def indexation(self, destination, path, package_type, fields, index=None, replace=False):
         """
             Process for index packages
             :param destination: index repository path
             :param path: path of the package
             :param package_type: package type (vnf, ns)
             :param fields: dict with the required values
+            :param index: index.yaml content, updated in memory. If None, index.yaml is loaded and saved
+            :param replace: replace the package if its id and version are already indexed
+            :return: True if the package was indexed, False if it already existed
         """
+        save = index is None
+        if save:
+            index = self.load_index(destination)
         data_ind = {'name': fields.get('name'), 'description': fields.get('description'),
-                    'vendor': fields.get('vendor'), 'path': fields.get('path')}
+                    'vendor': fields.get('vendor'), 'path': fields.get('path'), 'checksum': fields.get('checksum'),
+                    'size': os.path.getsize(path)}
 
         final_path = join(destination, package_type, fields.get('id'), fields.get('version'))
-        if isdir(join(destination, package_type, fields.get('id'))):
-            if isdir(final_path):
+        if isdir(final_path):
+            if not replace:
                 self._logger.warning('{} {} already exists'.format(package_type.upper(), str(path)))
-            else:
-                mkdir(final_path)
-                copyfile(path,
-                         final_path + '/' + fields.get('id') + "-" + fields.get('version') + '.tar.gz')
-                yaml.dump(fields, open(final_path + '/' + 'metadata.yaml', 'w'),
-                          Dumper=ruamel.yaml.RoundTripDumper)
-                index = yaml.load(open(destination + '/index.yaml'))
-
-                index['{}_packages'.format(package_type)][fields.get('id')][fields.get('version')] = data_ind
-                if versioning.parse(index['{}_packages'.format(package_type)][fields.get('id')][
-                                    'latest']) < versioning.parse(fields.get('version')):
-                    index['{}_packages'.format(package_type)][fields.get('id')]['latest'] = fields.get(
-                        'version')
-                yaml.dump(index, open(destination + '/index.yaml', 'w'), Dumper=ruamel.yaml.RoundTripDumper)
-                self._logger.info('{} {} added in the repository'.format(package_type.upper(), str(path)))
+                return False
+            self._logger.info('{} {} changed, replacing it'.format(package_type.upper(), str(path)))
+            rmtree(final_path)
+        makedirs(final_path)
+        copyfile(path,
+                 final_path + '/' + fields.get('id') + "-" + fields.get('version') + '.tar.gz')
+        with open(join(final_path, 'metadata.yaml'), 'w') as f:
+            yaml.dump(fields, f, Dumper=SafeDumper, default_flow_style=False)
+
+        packages = index['{}_packages'.format(package_type)]
+        if fields.get('id') in packages:
+            packages[fields.get('id')][fields.get('version')] = data_ind
+            if versioning.parse(packages[fields.get('id')]['latest']) < versioning.parse(fields.get('version')):
+                packages[fields.get('id')]['latest'] = fields.get('version')
         else:
-            mkdir(destination + '/{}/'.format(package_type) + fields.get('id'))
-            mkdir(final_path)
-            copyfile(path,
-                     final_path + '/' + fields.get('id') + "-" + fields.get('version') + '.tar.gz')
-            yaml.dump(fields, open(join(final_path, 'metadata.yaml'), 'w'), Dumper=ruamel.yaml.RoundTripDumper)
-            index = yaml.load(open(destination + '/index.yaml'))
-
-            index['{}_packages'.format(package_type)][fields.get('id')] = {fields.get('version'): data_ind}
-            index['{}_packages'.format(package_type)][fields.get('id')]['latest'] = fields.get('version')
-            yaml.dump(index, open(join(destination, 'index.yaml'), 'w'), Dumper=ruamel.yaml.RoundTripDumper)
-            self._logger.info('{} {} added in the repository'.format(package_type.upper(), str(path)))
+            packages[fields.get('id')] = {fields.get('version'): data_ind, 'latest': fields.get('version')}
+        if save:
+            self.save_index(destination, index)
+        self._logger.info('{} {} added in the repository'.format(package_type.upper(), str(path)))
+        return True
+
+    def load_index(self, destination):
+        """
+            Loads the index of a repository, from index.json unless index.yaml is newer
+            :param destination: index repository path
+            :return: index content
+        """
+        json_file = join(destination, 'index.json')
+        yaml_file = join(destination, 'index.yaml')
+        if isfile(json_file) and (not isfile(yaml_file) or stat(json_file).st_mtime >= stat(yaml_file).st_mtime):
+            return self.read_index_file(json_file)
+        return self.read_index_file(yaml_file)
+
+    def read_index_file(self, file_name):
+        """
+            Parses an index.json or index.yaml file
+        """
+        with open(file_name) as f:
+            if file_name.endswith('.json'):
+                return json.load(f)
+            return yaml.load(f, Loader=SafeLoader)
+
+    def save_index(self, destination, index):
+        """
+            Writes the index.yaml and index.json of a repository. The files are replaced atomically, so an
+            interrupted indexation never leaves a partial index behind
+            :param destination: index repository path
+            :param index: index content
+        """
+        self.atomic_yaml_dump(index, join(destination, 'index.yaml'))
+        self.atomic_write(json.dumps(index, separators=(',', ':'), sort_keys=True, default=str).encode(),
+                          join(destination, 'index.json'))
+
+    def atomic_write(self, content, file_name):
+        """
+            Writes content (bytes) to a temporary file that is renamed to file_name
+        """
+        fd, temp_file = tempfile.mkstemp(dir=dirname(file_name), prefix='.{}.'.format(basename(file_name)))
+        try:
+            with fdopen(fd, 'wb') as f:
+                f.write(content)
+            chmod(temp_file, 0o644)
+            replace(temp_file, file_name)
+        except Exception:
+            remove(temp_file)
+            raise
+
+    def atomic_yaml_dump(self, data, file_name):
+        """
+            Dumps data as yaml to a temporary file that is renamed to file_name
+        """
+        self.atomic_write(yaml.dump(data, Dumper=SafeDumper, default_flow_style=False).encode(), file_name)
 
     def current_datatime(self):
         """
@@ -375,5 +774,4 @@ class OSMRepo(Repo):
             mkdir(join(destination, 'ns'))
             index_data = {'apiVersion': 'v1', 'generated': self.current_datatime(), 'vnf_packages': {},
                           'ns_packages': {}}
-            with open(join(destination, 'index.yaml'), 'w') as outfile:
-                yaml.dump(index_data, outfile, default_flow_style=False)
+            self.save_index(destination, index_data)
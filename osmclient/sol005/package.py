@@ -75,12 +75,14 @@ class Package(object):
             raise ClientException("package {} failed to upload"
                                   .format(filename))
 
-    def upload(self, filename, skip_charm_build=False):
+    def upload(self, filename, skip_charm_build=False, skip_if_unchanged=False):
         self._logger.debug("")
         if os.path.isdir(filename):
             filename = filename.rstrip('/')
-            filename = self._client.package_tool.build(filename, skip_validation=False, skip_charm_build=skip_charm_build)
-            self.upload(filename)
+            # A reproducible build gives the same checksum if the package folder has not changed
+            filename = self._client.package_tool.build(filename, skip_validation=False, skip_charm_build=skip_charm_build,
+                                                       reproducible=skip_if_unchanged)
+            self.upload(filename, skip_if_unchanged=skip_if_unchanged)
         else:
             self._client.get_token()
             pkg_type = utils.get_key_val_from_pkg(filename)
@@ -100,6 +102,13 @@ class Package(object):
             #file_size = stat(filename).st_size
             #headers['Content-Range'] = 'bytes 0-{}/{}'.format(file_size - 1, file_size)
             headers["Content-File-MD5"] = utils.md5(filename)
+            if skip_if_unchanged:
+                package = utils.get_unchanged_package(self._http, endpoint[:-len('_content')], filename,
+                                                      headers["Content-File-MD5"])
+                if package:
+                    self._logger.info('Package {} unchanged, upload skipped'.format(filename))
+                    print(package['_id'])
+                    return
             http_header = ['{}: {}'.format(key,val)
                           for (key,val) in list(headers.items())]
             self._http.set_http_header(http_header)
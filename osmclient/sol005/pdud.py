@@ -43,9 +43,9 @@ class Pdu(object):
         filter_string = ''
         if filter:
             filter_string = '?{}'.format(filter)
-        _, resp = self._http.get2_cmd('{}{}'.format(self._apiBase,filter_string))
+        _, resp = self._http.get_json_cmd('{}{}'.format(self._apiBase,filter_string))
         if resp:
-            return json.loads(resp)
+            return resp
         return list()
 
     def get(self, name):
@@ -67,12 +67,12 @@ class Pdu(object):
         # It is redundant, since the previous one already gets the whole pdudInfo
         # The only difference is that a different primitive is exercised
         try:
-            _, resp = self._http.get2_cmd('{}/{}'.format(self._apiBase, pdud['_id']))
+            _, resp = self._http.get_json_cmd('{}/{}'.format(self._apiBase, pdud['_id']))
         except NotFound:
             raise NotFound("pdu '{}' not found".format(name))
         #print(yaml.safe_dump(resp))
         if resp:
-            return json.loads(resp)
+            return resp
         raise NotFound("pdu '{}' not found".format(name))
 
     def delete(self, name, force=False):
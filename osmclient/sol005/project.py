@@ -129,11 +129,11 @@ class Project(object):
         filter_string = ''
         if filter:
             filter_string = '?{}'.format(filter)
-        _, resp = self._http.get2_cmd('{}{}'.format(self._apiBase,filter_string),
+        _, resp = self._http.get_json_cmd('{}{}'.format(self._apiBase,filter_string),
                                                     skip_query_admin=True)
         #print('RESP: {}'.format(resp))
         if resp:
-            return json.loads(resp)
+            return resp
         return list()
 
     def get(self, name):
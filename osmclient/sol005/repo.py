@@ -112,9 +112,9 @@ class Repo(object):
         filter_string = ''
         if filter:
             filter_string = '?{}'.format(filter)
-        _, resp = self._http.get2_cmd('{}{}'.format(self._apiBase,filter_string))
+        _, resp = self._http.get_json_cmd('{}{}'.format(self._apiBase,filter_string))
         if resp:
-            return json.loads(resp)
+            return resp
         return list()
 
     def get(self, name):
@@ -125,9 +125,7 @@ class Repo(object):
         if not utils.validate_uuid4(name):
             repo_id = self.get_id(name)
         try:
-            _, resp = self._http.get2_cmd('{}/{}'.format(self._apiBase,repo_id))
-            if resp:
-                resp = json.loads(resp)
+            _, resp = self._http.get_json_cmd('{}/{}'.format(self._apiBase,repo_id))
             if not resp or '_id' not in resp:
                 raise ClientException('failed to get repo info: {}'.format(resp))
             return resp
@@ -225,11 +225,11 @@ class Vim(object):
         filter_string = ''
         if filter:
             filter_string = '?{}'.format(filter)
-        _, resp = self._http.get2_cmd('{}{}'.format(self._apiBase,filter_string))
+        _, resp = self._http.get_json_cmd('{}{}'.format(self._apiBase,filter_string))
         if not resp:
             return list()
         vim_accounts = []
-        for datacenter in json.loads(resp):
+        for datacenter in resp:
             vim_accounts.append({"name": datacenter['name'], "uuid": datacenter['_id']
                         if '_id' in datacenter else None})
         return vim_accounts
@@ -243,9 +243,7 @@ class Vim(object):
         if not utils.validate_uuid4(name):
             vim_id = self.get_id(name)
         try:
-            _, resp = self._http.get2_cmd('{}/{}'.format(self._apiBase,vim_id))
-            if resp:
-                resp = json.loads(resp)
+            _, resp = self._http.get_json_cmd('{}/{}'.format(self._apiBase,vim_id))
             if not resp or '_id' not in resp:
                 raise ClientException('failed to get vim info: {}'.format(resp))
             return resp
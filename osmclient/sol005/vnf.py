@@ -21,7 +21,6 @@ OSM vnf API handling
 from osmclient.common import utils
 from osmclient.common.exceptions import NotFound
 import logging
-import json
 
 class Vnf(object):
 
@@ -49,10 +48,10 @@ class Vnf(object):
                 filter_string += ',nsr-id-ref={}'.format(ns_instance['_id'])
             else:
                 filter_string = '?nsr-id-ref={}'.format(ns_instance['_id'])
-        _, resp = self._http.get2_cmd('{}{}'.format(self._apiBase,filter_string))
+        _, resp = self._http.get_json_cmd('{}{}'.format(self._apiBase,filter_string))
         #print('RESP: {}'.format(resp))
         if resp:
-            return json.loads(resp)
+            return resp
         return list()
 
     def get(self, name):
@@ -80,10 +79,10 @@ class Vnf(object):
                     vnf_id = vnf['_id']
                     break
         try:
-            _, resp = self._http.get2_cmd('{}/{}'.format(self._apiBase, vnf_id))
+            _, resp = self._http.get_json_cmd('{}/{}'.format(self._apiBase, vnf_id))
             #print('RESP: {}'.format(resp))
             if resp:
-                return json.loads(resp)
+                return resp
         except NotFound:
             raise NotFound("vnf '{}' not found".format(name))
         raise NotFound("vnf '{}' not found".format(name))
@@ -29,6 +29,7 @@ import logging
 import os.path
 from urllib.parse import quote
 import tarfile
+import sys
 from osm_im.validation import Validation as validation_im
 
 
@@ -51,9 +52,9 @@ class Vnfd(object):
         filter_string = ''
         if filter:
             filter_string = '?{}'.format(filter)
-        _, resp = self._http.get2_cmd('{}{}'.format(self._apiBase,filter_string))
+        _, resp = self._http.get_json_cmd('{}{}'.format(self._apiBase,filter_string))
         if resp:
-            return json.loads(resp)
+            return resp
         return list()
 
     def get(self, name):
@@ -75,10 +76,10 @@ class Vnfd(object):
         # It is redundant, since the previous one already gets the whole vnfpkginfo
         # The only difference is that a different primitive is exercised
         try:
-            _, resp = self._http.get2_cmd('{}/{}'.format(self._apiBase, vnfd['_id']))
+            _, resp = self._http.get_json_cmd('{}/{}'.format(self._apiBase, vnfd['_id']))
             #print(yaml.safe_dump(resp))
             if resp:
-                return json.loads(resp)
+                return resp
         except NotFound:
             raise NotFound("vnfd '{}' not found".format(name))
         raise NotFound("vnfd '{}' not found".format(name))
@@ -86,23 +87,8 @@ class Vnfd(object):
     def get_thing(self, name, thing, filename):
         self._logger.debug("")
         vnfd = self.get(name)
-        headers = self._client._headers
-        headers['Accept'] = 'application/binary'
-        http_code, resp = self._http.get2_cmd('{}/{}/{}'.format(self._apiBase, vnfd['_id'], thing))
-        #print('HTTP CODE: {}'.format(http_code))
-        #print('RESP: {}'.format(resp))
-        #if http_code in (200, 201, 202, 204):
-        if resp:
-            #store in a file
-            return json.loads(resp)
-        #else:
-        #    msg = ""
-        #    if resp:
-        #        try:
-        #            msg = json.loads(resp)
-        #        except ValueError:
-        #            msg = resp
-        #    raise ClientException("failed to get {} from {} - {}".format(thing, name, msg))
+        self._http.download_cmd('{}/{}/{}'.format(self._apiBase, vnfd['_id'], thing), filename,
+                                progress=sys.stderr.isatty())
 
     def get_descriptor(self, name, filename):
         self._logger.debug("")
@@ -141,15 +127,17 @@ class Vnfd(object):
             raise ClientException("failed to delete vnfd {} - {}".format(name, msg))
 
     def create(self, filename, overwrite=None, update_endpoint=None, skip_charm_build=False,
-               override_epa=False, override_nonepa=False, override_paravirt=False):
+               override_epa=False, override_nonepa=False, override_paravirt=False, skip_if_unchanged=False):
         self._logger.debug("")
         if os.path.isdir(filename):
             filename = filename.rstrip('/')
-            filename = self._client.package_tool.build(filename, skip_validation=False, skip_charm_build=skip_charm_build)
+            # A reproducible build gives the same checksum if the package folder has not changed
+            filename = self._client.package_tool.build(filename, skip_validation=False, skip_charm_build=skip_charm_build,
+                                                       reproducible=skip_if_unchanged)
             print('Uploading package {}'.format(filename))
             self.create(filename, overwrite=overwrite, update_endpoint=update_endpoint,
                         override_epa=override_epa, override_nonepa=override_nonepa,
-                        override_paravirt=override_paravirt)
+                        override_paravirt=override_paravirt, skip_if_unchanged=skip_if_unchanged)
         else:
             self._client.get_token()
             mime_type = magic.from_file(filename, mime=True)
@@ -182,19 +170,20 @@ class Vnfd(object):
                     with open(filename) as df:
                         descriptor_data = df.read()
                 elif mime_type in ['application/gzip', 'application/x-gzip']:
-                    tar_object = tarfile.open(filename, "r:gz")
-                    descriptor_list = []
-                    for member in tar_object:
-                        if member.isreg():
-                            if '/' not in os.path.dirname(member.name) and member.name.endswith('.yaml'):
-                                descriptor_list.append(member.name)
-                    if len(descriptor_list) > 1:
-                        raise ClientException('Found more than one potential descriptor in the tar.gz file')
-                    elif len(descriptor_list) == 0:
+                    # The package is read as a stream, only the top-level yaml files are extracted. All the
+                    # members are scanned, since archives not built by "osm package-build" may list a
+                    # top-level file after a sub-folder
+                    with tarfile.open(filename, "r|gz") as tar_object:
+                        for member in tar_object:
+                            top_level = '/' not in os.path.dirname(member.name)
+                            if member.isreg() and top_level and member.name.endswith('.yaml'):
+                                if descriptor_data is not None:
+                                    raise ClientException('Found more than one potential descriptor in the '
+                                                          'tar.gz file')
+                                with tar_object.extractfile(member) as df:
+                                    descriptor_data = df.read()
+                    if descriptor_data is None:
                         raise ClientException('No descriptor was found in the tar.gz file')
-                    with tar_object.extractfile(descriptor_list[0]) as df:
-                        descriptor_data = df.read()
-                    tar_object.close()
                 if not descriptor_data:
                     raise ClientException('Descriptor could not be read')
                 desc_type, vnfd = validation_im.yaml_validation(self, descriptor_data)
@@ -229,6 +218,14 @@ class Vnfd(object):
                 special_ow_string = special_ow_string.rstrip(";")
 
             headers["Content-File-MD5"] = utils.md5(filename)
+            # Overwritten fields change the descriptor stored by OSM, so the upload cannot be skipped
+            if skip_if_unchanged and not update_endpoint and not overwrite and not special_ow_string:
+                package = utils.get_unchanged_package(self._http, '{}{}/vnf_packages'.format(
+                    self._apiName, self._apiVersion), filename, headers["Content-File-MD5"])
+                if package:
+                    self._logger.info('Package {} unchanged, upload skipped'.format(filename))
+                    print(package['_id'])
+                    return
             http_header = ['{}: {}'.format(key,val)
                              for (key,val) in list(headers.items())]
             self._http.set_http_header(http_header)
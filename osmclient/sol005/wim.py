@@ -214,11 +214,11 @@ class Wim(object):
         filter_string = ''
         if filter:
             filter_string = '?{}'.format(filter)
-        _, resp = self._http.get2_cmd('{}{}'.format(self._apiBase,filter_string))
+        _, resp = self._http.get_json_cmd('{}{}'.format(self._apiBase,filter_string))
         if not resp:
             return list()
         wim_accounts = []
-        for datacenter in json.loads(resp):
+        for datacenter in resp:
             wim_accounts.append({"name": datacenter['name'], "uuid": datacenter['_id']
                         if '_id' in datacenter else None})
         return wim_accounts
@@ -232,9 +232,7 @@ class Wim(object):
         if not utils.validate_uuid4(name):
             wim_id = self.get_id(name)
         try:
-            _, resp = self._http.get2_cmd('{}/{}'.format(self._apiBase,wim_id))
-            if resp:
-                resp =  json.loads(resp)
+            _, resp = self._http.get_json_cmd('{}/{}'.format(self._apiBase,wim_id))
             if not resp or '_id' not in resp:
                 raise ClientException('failed to get wim info: {}'.format(resp))
             return resp